@@ -0,0 +1,127 @@
+import threading
+from collections import OrderedDict
+from copy import copy
+from hashlib import sha256
+from time import monotonic, time
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.authentication import TokenAuthentication
+
+from .replicas import read_from_primary
+
+SHARED_TOKEN_KEY = 'auth:token:{digest}'
+
+REVOKED_TOKEN_KEY = 'auth:revoked:{digest}'
+
+
+class TokenCache:
+
+    def __init__(self):
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    @property
+    def timeout(self):
+        return getattr(settings, 'TOKEN_CACHE_TIMEOUT', 60)
+
+    @property
+    def max_size(self):
+        return getattr(settings, 'TOKEN_CACHE_MAX_SIZE', 10000)
+
+    @property
+    def shared(self):
+        return getattr(settings, 'TOKEN_CACHE_SHARED', False)
+
+    @property
+    def shared_timeout(self):
+        return getattr(settings, 'TOKEN_CACHE_SHARED_TIMEOUT', 60 * 10)
+
+    def get_digest(self, key):
+        return sha256(key.encode()).hexdigest()
+
+    def get_shared_key(self, key):
+        return SHARED_TOKEN_KEY.format(digest=self.get_digest(key))
+
+    def get_revoked_key(self, key):
+        return REVOKED_TOKEN_KEY.format(digest=self.get_digest(key))
+
+    def is_revoked(self, key, cached):
+        revoked = cache.get(self.get_revoked_key(key))
+        return revoked is not None and revoked >= cached
+
+    def get_local(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            expires, cached, credentials = entry
+            if expires <= monotonic():
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return cached, credentials
+
+    def set_local(self, key, cached, credentials):
+        with self.lock:
+            self.entries[key] = (
+                monotonic() + self.timeout, cached, credentials)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+    def get(self, key):
+        entry = self.get_local(key)
+        if entry is None and self.shared:
+            entry = cache.get(self.get_shared_key(key))
+            if entry is not None:
+                self.set_local(key, *entry)
+        if entry is None:
+            return None
+        cached, credentials = entry
+        if self.is_revoked(key, cached):
+            self.delete_local([key])
+            return None
+        return credentials
+
+    def set(self, key, cached, credentials):
+        self.set_local(key, cached, credentials)
+        if self.shared:
+            cache.set(
+                self.get_shared_key(key), (cached, credentials),
+                self.shared_timeout)
+
+    def delete_local(self, keys):
+        with self.lock:
+            for key in keys:
+                self.entries.pop(key, None)
+
+    def delete(self, keys):
+        self.delete_local(keys)
+        revoked = time()
+        cache.set_many({
+            self.get_revoked_key(key): revoked for key in keys
+        }, max(self.timeout, self.shared_timeout))
+        if self.shared:
+            cache.delete_many([self.get_shared_key(key) for key in keys])
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+token_cache = TokenCache()
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+
+    def authenticate_credentials(self, key):
+        credentials = token_cache.get(key)
+        if credentials is None:
+            cached = time()
+            with read_from_primary():
+                credentials = super().authenticate_credentials(key)
+            token_cache.set(key, cached, credentials)
+        user, token = map(copy, credentials)
+        token.user = user
+        return user, token
@@ -0,0 +1,216 @@
+import json
+import random
+from base64 import b64encode
+from collections import Counter
+from io import BytesIO
+from math import ceil
+from statistics import mean
+from time import perf_counter
+
+import django
+from django.core.cache import cache
+from django.core.management import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.utils import timezone
+from PIL import Image
+from rest_framework.authtoken.models import Token
+
+from recipes.models import (FavoriteRecipe, Ingredient, Recipe,
+                            RecipeInShoppingList, Tag)
+from users.models import CustomUser, Subscription
+
+SCENARIOS = (
+    'recipes-list',
+    'recipes-list-tags',
+    'recipes-detail',
+    'recipes-create',
+    'subscriptions',
+    'ingredients-search',
+    'cart-download',
+)
+PERCENTILES = (50, 90, 95, 99)
+
+
+def percentile(values, rank):
+    return values[max(0, ceil(rank / 100 * len(values)) - 1)]
+
+
+class Command(BaseCommand):
+    help = 'Замер времени ответа и числа SQL-запросов основных эндпоинтов'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--iterations', type=int, default=50,
+            help='Количество замеров для каждого сценария')
+        parser.add_argument(
+            '--warmup', type=int, default=5,
+            help='Количество запросов перед замерами')
+        parser.add_argument(
+            '--scenario', action='append', choices=SCENARIOS,
+            dest='scenarios', help='Запустить только указанные сценарии')
+        parser.add_argument(
+            '--cold', action='store_true',
+            help='Очищать кеш перед каждым запросом')
+        parser.add_argument(
+            '--seed', type=int, default=0,
+            help='Начальное значение генератора')
+        parser.add_argument(
+            '--output', default='benchmark.json',
+            help='Файл для JSON-отчёта')
+
+    def prepare(self):
+        user = CustomUser.objects.annotate(
+            cart_size=Count('shop_list')
+        ).order_by('-cart_size', 'pk').first()
+        recipes = list(Recipe.objects.values_list('pk', flat=True)[:1000])
+        ingredients = list(Ingredient.objects.values_list(
+            'pk', 'name')[:1000])
+        if user is None or not recipes or not ingredients:
+            raise CommandError(
+                'Database is empty, run generate_data first')
+        token, _ = Token.objects.get_or_create(user=user)
+        self.anonymous = Client()
+        self.client = Client(HTTP_AUTHORIZATION=f'Token {token.key}')
+        self.recipes = recipes
+        self.ingredients = ingredients
+        self.tags = list(Tag.objects.values_list('pk', 'slug'))
+        self.pages = max(1, Recipe.objects.count() // 6)
+        buffer = BytesIO()
+        Image.new('RGB', (100, 100), '#49B64E').save(buffer, 'PNG')
+        self.image = (
+            'data:image/png;base64,' + b64encode(buffer.getvalue()).decode())
+        self.created = []
+
+    def get_dataset(self):
+        return {
+            'users': CustomUser.objects.count(),
+            'recipes': Recipe.objects.count(),
+            'ingredients': Ingredient.objects.count(),
+            'favorites': FavoriteRecipe.objects.count(),
+            'carts': RecipeInShoppingList.objects.count(),
+            'subscriptions': Subscription.objects.count(),
+        }
+
+    def request_recipes_list(self):
+        return self.anonymous.get(
+            '/api/recipes/', {'page': random.randint(1, self.pages)})
+
+    def request_recipes_list_tags(self):
+        return self.client.get('/api/recipes/', {
+            'page': random.randint(1, max(1, self.pages // 3)),
+            'tags': random.choice(self.tags)[1],
+        })
+
+    def request_recipes_detail(self):
+        return self.client.get(f'/api/recipes/{random.choice(self.recipes)}/')
+
+    def request_recipes_create(self):
+        response = self.client.post('/api/recipes/', json.dumps({
+            'name': 'Рецепт для замера',
+            'text': 'Описание рецепта для замера',
+            'cooking_time': random.randint(5, 180),
+            'image': self.image,
+            'tags': [pk for pk, _ in random.sample(
+                self.tags, min(2, len(self.tags)))],
+            'ingredients': [
+                {'id': pk, 'amount': random.randint(1, 500)}
+                for pk, _ in random.sample(
+                    self.ingredients, min(5, len(self.ingredients)))
+            ],
+        }), content_type='application/json')
+        if response.status_code == 201:
+            self.created.append(response.json()['id'])
+        return response
+
+    def request_recipes_delete(self):
+        return self.client.delete(f'/api/recipes/{self.created.pop()}/')
+
+    def request_subscriptions(self):
+        return self.client.get(
+            '/api/users/subscriptions/', {'recipes_limit': 3})
+
+    def request_ingredients_search(self):
+        return self.anonymous.get(
+            '/api/ingredients/',
+            {'name': random.choice(self.ingredients)[1][:3]})
+
+    def request_cart_download(self):
+        response = self.client.get('/api/recipes/download_shopping_cart/')
+        b''.join(response.streaming_content)
+        return response
+
+    def measure(self, request, cold):
+        if cold:
+            cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            start = perf_counter()
+            response = request()
+            elapsed = perf_counter() - start
+        return response.status_code, elapsed * 1000, len(queries)
+
+    def run_scenario(self, name, iterations, warmup, cold):
+        request = getattr(self, f'request_{name.replace("-", "_")}')
+        for _ in range(warmup):
+            self.measure(request, cold)
+        samples = [self.measure(request, cold) for _ in range(iterations)]
+        latencies = sorted(elapsed for _, elapsed, _ in samples)
+        queries = [count for _, _, count in samples]
+        return {
+            'requests': len(samples),
+            'statuses': dict(Counter(
+                str(status) for status, _, _ in samples)),
+            'latency_ms': {
+                'mean': round(mean(latencies), 3),
+                **{
+                    f'p{rank}': round(percentile(latencies, rank), 3)
+                    for rank in PERCENTILES
+                },
+                'max': round(latencies[-1], 3),
+            },
+            'queries': {
+                'mean': round(mean(queries), 2),
+                'max': max(queries),
+            },
+        }
+
+    def handle(self, *args, **options):
+        random.seed(options['seed'])
+        iterations, warmup = options['iterations'], options['warmup']
+        if iterations < 1:
+            raise CommandError('--iterations must be positive')
+        scenarios = options['scenarios'] or SCENARIOS
+        results = {}
+        with override_settings(ALLOWED_HOSTS=['*'], METRICS_DIR=''):
+            self.prepare()
+            dataset = self.get_dataset()
+            for name in scenarios:
+                results[name] = self.run_scenario(
+                    name, iterations, warmup, options['cold'])
+                if name == 'recipes-create' and self.created:
+                    results['recipes-delete'] = self.run_scenario(
+                        'recipes-delete', len(self.created), 0,
+                        options['cold'])
+        report = {
+            'created': timezone.now().isoformat(),
+            'database': connection.vendor,
+            'django': django.get_version(),
+            'iterations': iterations,
+            'warmup': warmup,
+            'cold': options['cold'],
+            'dataset': dataset,
+            'scenarios': results,
+        }
+        with open(options['output'], 'w', encoding='utf-8') as file:
+            json.dump(report, file, indent=2, sort_keys=True)
+        for name, result in results.items():
+            latency = result['latency_ms']
+            self.stdout.write(
+                f'{name:<20} p50={latency["p50"]:>9.2f}ms '
+                f'p95={latency["p95"]:>9.2f}ms '
+                f'queries={result["queries"]["mean"]:>6.1f} '
+                f'statuses={result["statuses"]}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Report written to {options["output"]}'))
@@ -0,0 +1,171 @@
+import asyncio
+import json
+import random
+from collections import Counter
+from statistics import mean
+from time import monotonic, perf_counter
+from urllib.parse import quote, urlsplit
+
+from django.core.management import BaseCommand, CommandError
+from django.utils import timezone
+
+from .benchmark import PERCENTILES, percentile
+
+DEFAULT_PATHS = (
+    '/api/recipes/',
+    '/api/recipes/?page=2',
+    '/api/tags/',
+    '/api/ingredients/?name=са',
+)
+
+
+async def read_headers(reader):
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionError('Connection closed')
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip().lower()
+    return int(status_line.split()[1]), headers
+
+
+async def read_response(reader):
+    status, headers = await read_headers(reader)
+    close = headers.get('connection') == 'close'
+    if 'chunked' in headers.get('transfer-encoding', ''):
+        while True:
+            size = int((await reader.readline()).split(b';')[0], 16)
+            await reader.readexactly(size + 2)
+            if not size:
+                break
+    elif 'content-length' in headers:
+        await reader.readexactly(int(headers['content-length']))
+    elif status not in (204, 304):
+        await reader.read()
+        close = True
+    return status, close
+
+
+class Command(BaseCommand):
+    help = (
+        'Нагрузочное тестирование запущенного сервера множеством '
+        'одновременных keep-alive соединений'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'targets', nargs='+', metavar='NAME=URL',
+            help='Серверы для сравнения, например wsgi=http://localhost:8000')
+        parser.add_argument(
+            '--path', action='append', dest='paths',
+            help='Запрашиваемый путь, можно указать несколько раз')
+        parser.add_argument(
+            '--concurrency', type=int, default=500,
+            help='Количество одновременных соединений')
+        parser.add_argument(
+            '--duration', type=float, default=10,
+            help='Длительность замера в секундах')
+        parser.add_argument(
+            '--token', help='Токен для заголовка Authorization')
+        parser.add_argument(
+            '--output', default='loadtest.json',
+            help='Файл для JSON-отчёта')
+
+    def build_request(self, host, path, token):
+        headers = [
+            f'GET {quote(path, safe="/?=&")} HTTP/1.1',
+            f'Host: {host}',
+            'Accept: application/json',
+            'Connection: keep-alive',
+        ]
+        if token:
+            headers.append(f'Authorization: Token {token}')
+        return ('\r\n'.join(headers) + '\r\n\r\n').encode()
+
+    async def run_client(self, url, requests, deadline, samples, errors):
+        writer = None
+        while monotonic() < deadline:
+            try:
+                if writer is None:
+                    reader, writer = await asyncio.open_connection(
+                        url.hostname, url.port or 80)
+                start = perf_counter()
+                writer.write(random.choice(requests))
+                await writer.drain()
+                status, close = await read_response(reader)
+                samples.append((status, perf_counter() - start))
+            except (OSError, ValueError, asyncio.IncompleteReadError) as error:
+                errors[type(error).__name__] += 1
+                close = True
+                await asyncio.sleep(0.05)
+            if close and writer is not None:
+                writer.close()
+                writer = None
+        if writer is not None:
+            writer.close()
+
+    async def run_target(self, url, paths, concurrency, duration, token):
+        url = urlsplit(url)
+        requests = [
+            self.build_request(url.netloc, path, token) for path in paths]
+        samples, errors = [], Counter()
+        started = monotonic()
+        await asyncio.gather(*(
+            self.run_client(
+                url, requests, started + duration, samples, errors)
+            for _ in range(concurrency)
+        ))
+        elapsed = monotonic() - started
+        latencies = sorted(latency * 1000 for _, latency in samples)
+        result = {
+            'requests': len(samples),
+            'requests_per_second': round(len(samples) / elapsed, 1),
+            'statuses': dict(Counter(str(status) for status, _ in samples)),
+            'errors': dict(errors),
+        }
+        if latencies:
+            result['latency_ms'] = {
+                'mean': round(mean(latencies), 3),
+                **{
+                    f'p{rank}': round(percentile(latencies, rank), 3)
+                    for rank in PERCENTILES
+                },
+                'max': round(latencies[-1], 3),
+            }
+        return result
+
+    def handle(self, *args, **options):
+        targets = {}
+        for target in options['targets']:
+            name, separator, url = target.partition('=')
+            if not separator or not url.startswith('http://'):
+                raise CommandError(f'Expected NAME=http://host:port: {target}')
+            targets[name] = url
+        paths = options['paths'] or DEFAULT_PATHS
+        results = {}
+        for name, url in targets.items():
+            results[name] = asyncio.run(self.run_target(
+                url, paths, options['concurrency'], options['duration'],
+                options['token']))
+            result = results[name]
+            self.stdout.write(
+                f'{name:<10} rps={result["requests_per_second"]:>9.1f} '
+                f'p50={result.get("latency_ms", {}).get("p50", 0):>9.2f}ms '
+                f'p99={result.get("latency_ms", {}).get("p99", 0):>9.2f}ms '
+                f'errors={sum(result["errors"].values())}')
+        report = {
+            'created': timezone.now().isoformat(),
+            'concurrency': options['concurrency'],
+            'duration': options['duration'],
+            'paths': list(paths),
+            'targets': targets,
+            'results': results,
+        }
+        with open(options['output'], 'w', encoding='utf-8') as file:
+            json.dump(report, file, indent=2, sort_keys=True)
+        self.stdout.write(self.style.SUCCESS(
+            f'Report written to {options["output"]}'))
@@ -0,0 +1,215 @@
+import json
+from hashlib import md5
+
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import quote_etag
+from rest_framework.generics import get_object_or_404
+from rest_framework.response import Response
+
+from recipes.catalog import (get_catalog_version, get_object_version,
+                             get_object_versions)
+
+from .relations import get_relations_version
+from .replicas import read_from_primary
+
+CATALOG_DATA_KEY = 'catalog:data:{label}:{version}'
+ANONYMOUS_RESPONSE_KEY = 'anonymous:{label}:{action}:{version}:{digest}'
+CACHED_HEADERS = ('Content-Type', 'ETag', 'Vary', 'Allow')
+
+
+def get_catalog_etag(model, version, query_string):
+    return quote_etag(md5(
+        f'{model._meta.label_lower}:{version}:{query_string}'.encode()
+    ).hexdigest())
+
+
+def get_anonymous_cache_key(model, action, versions, request,
+                            renderer_format):
+    params = sorted(
+        (name, value)
+        for name, values in request.GET.lists()
+        for value in values
+    )
+    return ANONYMOUS_RESPONSE_KEY.format(
+        label=model._meta.label_lower,
+        action=action,
+        version=md5(':'.join(versions).encode()).hexdigest(),
+        digest=md5(json.dumps([
+            request.build_absolute_uri('/'),
+            renderer_format,
+            params,
+        ]).encode()).hexdigest(),
+    )
+
+
+def get_cached_response(request, cached):
+    content, headers = cached
+    response = get_conditional_response(request, etag=headers.get('ETag'))
+    if response is None:
+        response = HttpResponse(content)
+    for header, value in headers.items():
+        response[header] = value
+    return response
+
+
+class CatalogCacheMixin:
+    catalog_timeout = 60 * 60 * 24
+
+    def get_catalog_data(self, version):
+        key = CATALOG_DATA_KEY.format(
+            label=self.queryset.model._meta.label_lower, version=version)
+        data = cache.get(key)
+        if data is None:
+            with read_from_primary():
+                queryset = self.filter_queryset(self.get_queryset())
+                data = list(self.get_serializer(queryset, many=True).data)
+            cache.set(key, data, self.catalog_timeout)
+        return data
+
+    def list(self, request, *args, **kwargs):
+        model = self.queryset.model
+        version = get_catalog_version(model)
+        etag = get_catalog_etag(
+            model, version, request.META.get('QUERY_STRING', ''))
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = Response(self.get_catalog_data(version))
+        response['ETag'] = etag
+        return response
+
+
+class ConditionalResponseMixin:
+    updated_field = 'updated'
+    conditional_fields = ()
+    related_catalogs = ()
+
+    def get_conditional_queryset(self):
+        fields = {
+            'id', self.updated_field, *self.conditional_fields,
+            *getattr(self, 'cursor_ordering', ()),
+        }
+        return self.filter_queryset(self.get_queryset()).select_related(
+            None).prefetch_related(None).only(*fields)
+
+    def get_etag(self, request, objects, extra=None):
+        fields = (self.updated_field, *self.conditional_fields)
+        state = {
+            'query': request.META.get('QUERY_STRING', ''),
+            'relations': get_relations_version(request),
+            'catalogs': [
+                get_catalog_version(model)
+                for model in self.related_catalogs
+            ],
+            'objects': [
+                [obj.pk, version,
+                 *(str(getattr(obj, field)) for field in fields)]
+                for obj, version in zip(objects, get_object_versions(
+                    self.queryset.model, [obj.pk for obj in objects]))
+            ],
+            'extra': extra,
+        }
+        return quote_etag(md5(
+            json.dumps(state, default=str).encode()).hexdigest())
+
+    def finalize_conditional_response(self, response, etag):
+        response['ETag'] = etag
+        patch_vary_headers(response, ('Authorization',))
+        return response
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.get_conditional_queryset()
+        page = self.paginate_queryset(queryset)
+        objects = list(queryset) if page is None else page
+        extra = None
+        if page is not None:
+            extra = self.get_paginated_response([]).data
+        etag = self.get_etag(request, objects, extra)
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            pks = [obj.pk for obj in objects]
+            instances = super().get_queryset().in_bulk(pks)
+            serializer = self.get_serializer(
+                [instances[pk] for pk in pks if pk in instances], many=True)
+            if page is None:
+                response = Response(serializer.data)
+            else:
+                response = self.get_paginated_response(serializer.data)
+        return self.finalize_conditional_response(response, etag)
+
+    def retrieve(self, request, *args, **kwargs):
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        obj = get_object_or_404(
+            self.get_conditional_queryset(),
+            **{self.lookup_field: kwargs[lookup_url_kwarg]}
+        )
+        self.check_object_permissions(request, obj)
+        etag = self.get_etag(request, [obj])
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = super().retrieve(request, *args, **kwargs)
+        return self.finalize_conditional_response(response, etag)
+
+
+class AnonymousCacheMixin:
+    anonymous_cache_timeout = 60 * 10
+    anonymous_list_timeout = 60
+    anonymous_cache_actions = ('list', 'retrieve')
+    related_catalogs = ()
+    anonymous_cache_key = None
+
+    def get_cache_key(self, request):
+        if (request.user.is_authenticated
+                or self.action not in self.anonymous_cache_actions):
+            return None
+        model = self.queryset.model
+        if self.action == 'retrieve':
+            pk = self.kwargs.get(self.lookup_url_kwarg or self.lookup_field)
+            if not pk or not pk.isdigit():
+                return None
+            versions = [pk, get_object_version(model, int(pk))]
+        else:
+            versions = [get_catalog_version(model)]
+        versions += [
+            get_catalog_version(related)
+            for related in self.related_catalogs
+        ]
+        return get_anonymous_cache_key(
+            model, self.action, versions, request,
+            request.accepted_renderer.format)
+
+    def get_anonymous_timeout(self):
+        if self.action == 'list':
+            return self.anonymous_list_timeout
+        return self.anonymous_cache_timeout
+
+    def get_anonymous_response(self, request, handler, *args, **kwargs):
+        key = self.get_cache_key(request)
+        cached = cache.get(key) if key else None
+        if cached is None and key:
+            self.anonymous_cache_key = key
+            with read_from_primary():
+                return handler(request, *args, **kwargs)
+        if cached is None:
+            return handler(request, *args, **kwargs)
+        return get_cached_response(request, cached)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(
+            request, response, *args, **kwargs)
+        if self.anonymous_cache_key and response.status_code == 200:
+            response.render()
+            cache.set(self.anonymous_cache_key, (response.content, {
+                header: response[header]
+                for header in CACHED_HEADERS if response.has_header(header)
+            }), self.get_anonymous_timeout())
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.get_anonymous_response(
+            request, super().list, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.get_anonymous_response(
+            request, super().retrieve, *args, **kwargs)
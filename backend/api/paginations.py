@@ -1,6 +1,105 @@
+import binascii
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+
+from django.db.models import Q
 from rest_framework import pagination
+from rest_framework.exceptions import NotFound
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(pagination.BasePagination):
+    page_size = 6
+    page_size_query_param = 'limit'
+    cursor_query_param = 'cursor'
+    ordering = ('name', 'id')
+    invalid_cursor_message = 'Некорректный курсор.'
+
+    def get_page_size(self, request):
+        page_size = request.query_params.get(self.page_size_query_param)
+        if page_size and page_size.isdigit() and int(page_size) > 0:
+            return int(page_size)
+        return self.page_size
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+        try:
+            cursor = json.loads(urlsafe_b64decode(encoded.encode()))
+            position, reverse = cursor['p'], bool(cursor['r'])
+        except (binascii.Error, ValueError, TypeError, KeyError):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(position, list) or (
+                len(position) != len(self.ordering)):
+            raise NotFound(self.invalid_cursor_message)
+        return position, reverse
+
+    def encode_cursor(self, item, reverse):
+        position = [getattr(item, field) for field in self.ordering]
+        cursor = json.dumps({'p': position, 'r': int(reverse)})
+        return replace_query_param(
+            self.base_url, self.cursor_query_param,
+            urlsafe_b64encode(cursor.encode()).decode()
+        )
+
+    def get_keyset_filter(self, position, reverse):
+        lookup = 'lt' if reverse else 'gt'
+        keyset_filter = Q()
+        for index, field in enumerate(self.ordering):
+            keyset_filter |= Q(
+                **dict(zip(self.ordering[:index], position[:index])),
+                **{f'{field}__{lookup}': position[index]}
+            )
+        return keyset_filter
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.ordering = getattr(view, 'cursor_ordering', self.ordering)
+        self.base_url = remove_query_param(
+            request.build_absolute_uri(), 'page')
+        page_size = self.get_page_size(request)
+        position, reverse = self.decode_cursor(request)
+        ordering = [
+            f'-{field}' if reverse else field for field in self.ordering
+        ]
+        queryset = queryset.order_by(*ordering)
+        if position is not None:
+            queryset = queryset.filter(
+                self.get_keyset_filter(position, reverse))
+        results = list(queryset[:page_size + 1])
+        has_more = len(results) > page_size
+        results = results[:page_size]
+        if reverse:
+            results.reverse()
+        self.next = self.previous = None
+        if results and (has_more or reverse):
+            self.next = self.encode_cursor(results[-1], False)
+        if results and (has_more if reverse else position is not None):
+            self.previous = self.encode_cursor(results[0], True)
+        return results
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.next,
+            'previous': self.previous,
+            'results': data,
+        })
 
 
 class CustomPagination(pagination.PageNumberPagination):
     page_size = 6
     page_size_query_param = 'limit'
+    keyset_class = KeysetPagination
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = None
+        if self.keyset_class.cursor_query_param in request.query_params:
+            self.keyset = self.keyset_class()
+            return self.keyset.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.keyset is not None:
+            return self.keyset.get_paginated_response(data)
+        return super().get_paginated_response(data)
@@ -0,0 +1,78 @@
+from uuid import uuid4
+
+from django.core.cache import cache
+
+from backend.metrics import store
+from recipes.models import FavoriteRecipe, RecipeInShoppingList
+from users.models import Subscription
+
+from .replicas import read_from_primary
+
+RELATIONS_TIMEOUT = 60 * 60
+VERSION_KEY = 'relations:version:{user_id}'
+DATA_KEY = 'relations:{user_id}:{version}'
+
+
+class UserRelations:
+    __slots__ = ('subscriptions', 'favorites', 'cart')
+
+    def __init__(self, subscriptions=(), favorites=(), cart=()):
+        self.subscriptions = frozenset(subscriptions)
+        self.favorites = frozenset(favorites)
+        self.cart = frozenset(cart)
+
+
+EMPTY_RELATIONS = UserRelations()
+
+
+def _get_version(user_id):
+    key = VERSION_KEY.format(user_id=user_id)
+    version = cache.get(key)
+    if version is None:
+        version = uuid4().hex
+        cache.set(key, version, None)
+    return version
+
+
+def _load_relations(user_id):
+    return UserRelations(
+        subscriptions=Subscription.objects.filter(
+            user_id=user_id).values_list('author_id', flat=True),
+        favorites=FavoriteRecipe.objects.filter(
+            user_id=user_id).values_list('recipe_id', flat=True),
+        cart=RecipeInShoppingList.objects.filter(
+            user_id=user_id).values_list('recipe_id', flat=True),
+    )
+
+
+def get_relations(request):
+    relations = getattr(request, '_relations', None)
+    if relations is not None:
+        return relations
+    user = request.user
+    if not user.is_authenticated:
+        return EMPTY_RELATIONS
+    key = DATA_KEY.format(user_id=user.pk, version=_get_version(user.pk))
+    relations = cache.get(key)
+    if relations is None:
+        store.inc('relations_cache_total', (('result', 'miss'),))
+        with read_from_primary():
+            relations = _load_relations(user.pk)
+        cache.set(key, relations, RELATIONS_TIMEOUT)
+    else:
+        store.inc('relations_cache_total', (('result', 'hit'),))
+    request._relations = relations
+    return relations
+
+
+def get_relations_version(request):
+    user = request.user
+    if not user.is_authenticated:
+        return ''
+    return _get_version(user.pk)
+
+
+def invalidate_relations(request):
+    cache.set(
+        VERSION_KEY.format(user_id=request.user.pk), uuid4().hex, None)
+    request._relations = None
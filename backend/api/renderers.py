@@ -0,0 +1,53 @@
+import csv
+import io
+import json
+
+from rest_framework import renderers
+
+
+class ShoppingCartRenderer(renderers.BaseRenderer):
+    charset = 'utf-8'
+
+
+class ShoppingCartTextRenderer(ShoppingCartRenderer):
+    media_type = 'text/plain'
+    format = 'txt'
+
+    def stream(self, rows):
+        separator = ''
+        for name, unit, amount in rows:
+            yield f'{separator}{name} ({unit}) - {amount}'.encode(self.charset)
+            separator = '\n'
+
+
+class ShoppingCartCSVRenderer(ShoppingCartRenderer):
+    media_type = 'text/csv'
+    format = 'csv'
+    header = ('name', 'measurement_unit', 'amount')
+
+    def stream(self, rows):
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, lineterminator='\n')
+        writer.writerow(self.header)
+        for row in rows:
+            writer.writerow(row)
+            yield buffer.getvalue().encode(self.charset)
+            buffer.seek(0)
+            buffer.truncate()
+        yield buffer.getvalue().encode(self.charset)
+
+
+class ShoppingCartJSONRenderer(ShoppingCartRenderer):
+    media_type = 'application/json'
+    format = 'json'
+
+    def stream(self, rows):
+        separator = '['
+        for name, unit, amount in rows:
+            item = json.dumps(
+                {'name': name, 'measurement_unit': unit, 'amount': amount},
+                ensure_ascii=False
+            )
+            yield f'{separator}{item}'.encode(self.charset)
+            separator = ','
+        yield b'[]' if separator == '[' else b']'
@@ -0,0 +1,121 @@
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+from hashlib import sha256
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+PRIMARY_COOKIE = 'use_primary_db'
+PRIMARY_KEY = 'db:primary:{digest}'
+
+
+class ReplicaState:
+
+    def __init__(self, primary):
+        self.primary = primary
+        self.wrote = False
+
+
+current_state = ContextVar('current_replica_state', default=None)
+
+
+def get_replicas():
+    return [alias for alias in settings.DATABASES if alias != DEFAULT_DB_ALIAS]
+
+
+@contextmanager
+def read_from_primary():
+    state = current_state.get()
+    if state is None or state.primary:
+        yield
+        return
+    state.primary = True
+    try:
+        yield
+    finally:
+        state.primary = False
+
+
+class ReplicaRouter:
+
+    def db_for_read(self, model, **hints):
+        state = current_state.get()
+        replicas = get_replicas()
+        if state is None or state.primary or not replicas:
+            return DEFAULT_DB_ALIAS
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        state = current_state.get()
+        if state is not None:
+            state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = set(settings.DATABASES)
+        if {obj1._state.db, obj2._state.db} <= databases:
+            return True
+        return None
+
+
+def get_primary_key(request):
+    authorization = request.META.get('HTTP_AUTHORIZATION')
+    if not authorization:
+        return None
+    return PRIMARY_KEY.format(
+        digest=sha256(authorization.encode()).hexdigest())
+
+
+class ReplicaMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def start(self, request):
+        key = get_primary_key(request)
+        primary = (
+            request.method not in SAFE_METHODS
+            or PRIMARY_COOKIE in request.COOKIES
+            or bool(key and cache.get(key))
+        )
+        return ReplicaState(primary), key
+
+    def finish(self, state, key, response):
+        if not state.wrote:
+            return response
+        timeout = getattr(settings, 'REPLICA_STICKY_SECONDS', 5)
+        if key:
+            cache.set(key, True, timeout)
+        response.set_cookie(
+            PRIMARY_COOKIE, '1', max_age=timeout, httponly=True,
+            samesite='Lax')
+        return response
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        state, key = self.start(request)
+        token = current_state.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            current_state.reset(token)
+        return self.finish(state, key, response)
+
+    async def __acall__(self, request):
+        state, key = self.start(request)
+        token = current_state.set(state)
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_state.reset(token)
+        return self.finish(state, key, response)
@@ -0,0 +1,66 @@
+from bisect import bisect_left
+from threading import Lock
+from time import monotonic
+
+from recipes.catalog import get_catalog_version
+from recipes.models import Ingredient
+
+from .replicas import read_from_primary
+from .serializers import IngredientSerializer
+
+
+def normalize(value):
+    return value.lower().replace('ё', 'е')
+
+
+class IngredientIndex:
+    max_age = 60 * 5
+
+    def __init__(self):
+        self.version = None
+        self.built = 0
+        self.entries = ([], [])
+        self.lock = Lock()
+
+    def build(self, version):
+        ingredients = sorted(
+            ((normalize(ingredient.name), ingredient)
+             for ingredient in Ingredient.objects.all()),
+            key=lambda pair: (pair[0], pair[1].measurement_unit)
+        )
+        names = [name for name, _ in ingredients]
+        items = list(IngredientSerializer(
+            [ingredient for _, ingredient in ingredients], many=True).data)
+        self.entries = (names, items)
+        self.version = version
+        self.built = monotonic()
+
+    def is_stale(self, version):
+        return (
+            version != self.version
+            or monotonic() - self.built > self.max_age
+        )
+
+    def refresh(self):
+        version = get_catalog_version(Ingredient)
+        if self.is_stale(version):
+            with self.lock:
+                if self.is_stale(version):
+                    with read_from_primary():
+                        self.build(version)
+
+    def search(self, query):
+        self.refresh()
+        names, items = self.entries
+        query = normalize(query)
+        start = end = bisect_left(names, query)
+        while end < len(names) and names[end].startswith(query):
+            end += 1
+        infix = [
+            items[index] for index, name in enumerate(names)
+            if query in name and not start <= index < end
+        ]
+        return items[start:end] + infix
+
+
+ingredient_index = IngredientIndex()
@@ -1,9 +1,26 @@
+from django.db import transaction
+from django.db.models import prefetch_related_objects
 from drf_extra_fields.fields import Base64ImageField
 from rest_framework import serializers
 
+from recipes.cart import change_recipe_in_carts, lock_recipes
+from recipes.images import is_image_too_large
 from recipes.models import (FavoriteRecipe, Ingredient, IngredientToRecipe,
-                            Recipe, RecipeInShoppingList, Tag)
-from users.models import CustomUser, Subscription
+                            Recipe, RecipeInShoppingList, RecipeQuerySet,
+                            ShoppingCartIngredient, Tag)
+from recipes.tasks import generate_recipe_image_variants
+from users.models import CustomUser
+
+from .relations import get_relations
+
+
+def get_image_variant_urls(recipe, request=None):
+    storage = recipe.image.storage
+    urls = {}
+    for name, path in (recipe.image_variants or {}).items():
+        url = storage.url(path)
+        urls[name] = request.build_absolute_uri(url) if request else url
+    return urls
 
 
 class AuthorSerializer(serializers.ModelSerializer):
@@ -15,10 +32,8 @@ class AuthorSerializer(serializers.ModelSerializer):
                   'last_name', 'is_subscribed')
 
     def get_is_subscribed(self, obj):
-        user = self.context['request'].user
-        if user.is_authenticated:
-            return Subscription.objects.filter(author=obj, user=user).exists()
-        return False
+        relations = get_relations(self.context['request'])
+        return obj.pk in relations.subscriptions
 
 
 class TagSerializer(serializers.ModelSerializer):
@@ -46,6 +61,17 @@ class IngredientToRecipeSerializer(serializers.ModelSerializer):
         fields = ('id', 'name', 'measurement_unit', 'amount')
 
 
+class ShoppingCartIngredientSerializer(serializers.ModelSerializer):
+    id = serializers.ReadOnlyField(source='ingredient.id')
+    name = serializers.ReadOnlyField(source='ingredient.name')
+    measurement_unit = serializers.ReadOnlyField(
+        source='ingredient.measurement_unit')
+
+    class Meta:
+        model = ShoppingCartIngredient
+        fields = ('id', 'name', 'measurement_unit', 'amount')
+
+
 class RecipeSerializer(serializers.ModelSerializer):
     author = AuthorSerializer()
     tags = TagSerializer(many=True)
@@ -55,32 +81,26 @@ class RecipeSerializer(serializers.ModelSerializer):
     )
     is_favorited = serializers.SerializerMethodField()
     is_in_shopping_cart = serializers.SerializerMethodField()
+    image_variants = serializers.SerializerMethodField()
 
     class Meta:
         model = Recipe
-        fields = '__all__'
+        exclude = ('search_vector',)
+
+    def get_image_variants(self, obj):
+        return get_image_variant_urls(obj, self.context.get('request'))
 
     def get_is_favorited(self, obj):
-        user = self.context.get('request').user
-        if not user.is_anonymous:
-            return FavoriteRecipe.objects.filter(
-                user=user,
-                recipe=obj).exists()
-        return False
+        relations = get_relations(self.context['request'])
+        return obj.pk in relations.favorites
 
     def get_is_in_shopping_cart(self, obj):
-        user = self.context.get('request').user
-        if not user.is_anonymous:
-            return RecipeInShoppingList.objects.filter(
-                user=user,
-                recipe=obj).exists()
-        return False
+        relations = get_relations(self.context['request'])
+        return obj.pk in relations.cart
 
 
 class RecipeIngredienCreateSerialier(serializers.ModelSerializer):
-    id = serializers.PrimaryKeyRelatedField(
-        queryset=Ingredient.objects.all()
-    )
+    id = serializers.IntegerField()
 
     class Meta:
         model = IngredientToRecipe
@@ -109,10 +129,24 @@ class FavoriteSerializer(serializers.ModelSerializer):
         fields = ('id', 'name', 'image', 'cooking_time')
 
 
+class RecipeIdsSerializer(serializers.Serializer):
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False, max_length=100)
+
+    def validate_ids(self, value):
+        return list(dict.fromkeys(value))
+
+
 class RecipeFavoriteSerializer(serializers.ModelSerializer):
+    image_variants = serializers.SerializerMethodField()
+
     class Meta:
         model = Recipe
-        fields = ('id', 'name', 'image', 'cooking_time')
+        fields = ('id', 'name', 'image', 'image_variants', 'cooking_time')
+
+    def get_image_variants(self, obj):
+        return get_image_variant_urls(obj, self.context.get('request'))
 
 
 class RecipeCreateSerializer(serializers.ModelSerializer):
@@ -134,49 +168,72 @@ class RecipeCreateSerializer(serializers.ModelSerializer):
             'cooking_time'
         )
 
-    def validate(self, data):
-        ingredients = data['ingredients']
-        ingredients_id = set()
+    def validate_image(self, image):
+        if is_image_too_large(image):
+            raise serializers.ValidationError(
+                'Изображение слишком большое.')
+        return image
+
+    def validate_ingredients(self, ingredients):
+        found = Ingredient.objects.in_bulk(
+            {ingredient['id'] for ingredient in ingredients})
         for ingredient in ingredients:
+            if ingredient['id'] not in found:
+                raise serializers.ValidationError(
+                    f'Ингредиент {ingredient["id"]} не найден.')
+            ingredient['id'] = found[ingredient['id']]
+        return ingredients
+
+    def validate(self, data):
+        ingredients = data.get('ingredients')
+        if ingredients is not None:
             if not ingredients:
                 raise serializers.ValidationError('Не указаны ингредиенты')
-            if ingredient['id'] in ingredients_id:
-                raise serializers.ValidationError(
-                    'Ингредиент в рецепте не может дублироваться.'
-                )
-            ingredients_id.add(ingredient['id'])
-        tags = data['tags']
-        tags_id = set()
-        for tag in tags:
+            ingredients_id = set()
+            for ingredient in ingredients:
+                if ingredient['id'] in ingredients_id:
+                    raise serializers.ValidationError(
+                        'Ингредиент в рецепте не может дублироваться.'
+                    )
+                ingredients_id.add(ingredient['id'])
+        tags = data.get('tags')
+        if tags is not None:
             if not tags:
                 raise serializers.ValidationError('Не указаны теги')
-            if tag in tags_id:
+            if len(set(tags)) != len(tags):
                 raise serializers.ValidationError(
                     'Тег в рецепте не может дублироваться.'
                 )
-            tags_id.add(tag)
         return data
 
     def create(self, validated_data):
         ingredients = validated_data.pop('ingredients', None)
         tags = validated_data.pop('tags', None)
-        instance = Recipe.objects.create(**validated_data)
-        self.create_ingredients_for_recipe(instance, ingredients, tags)
-        instance.tags.set(tags)
+        with transaction.atomic():
+            instance = Recipe.objects.create(**validated_data)
+            self.create_ingredients_for_recipe(instance, ingredients)
+            instance.tags.set(tags)
+            generate_recipe_image_variants.delay(recipe_id=instance.pk)
         return instance
 
     def update(self, instance, validated_data):
         ingredients = validated_data.pop('ingredients', None)
         tags = validated_data.pop('tags', None)
-        if ingredients:
-            instance.ingredients.clear()
-            instance.tags.clear()
-            self.create_ingredients_for_recipe(instance, ingredients, tags)
-        return super().update(instance, validated_data)
-
-    def create_ingredients_for_recipe(self, instance, ingredients, tags):
-        for tag in tags:
-            instance.tags.add(tag)
+        image = validated_data.get('image')
+        with transaction.atomic():
+            lock_recipes([instance.pk])
+            if ingredients is not None:
+                self.update_ingredients_for_recipe(instance, ingredients)
+            if tags is not None:
+                instance.tags.set(tags)
+            for attr, value in validated_data.items():
+                setattr(instance, attr, value)
+            instance.save(update_fields=[*validated_data, 'updated'])
+            if image:
+                generate_recipe_image_variants.delay(recipe_id=instance.pk)
+        return instance
+
+    def create_ingredients_for_recipe(self, instance, ingredients):
         IngredientToRecipe.objects.bulk_create([
             IngredientToRecipe(
                 recipe=instance,
@@ -185,31 +242,71 @@ class RecipeCreateSerializer(serializers.ModelSerializer):
             ) for ingredient in ingredients
         ])
 
+    def update_ingredients_for_recipe(self, instance, ingredients):
+        existing = {
+            item.ingredient_id: item
+            for item in IngredientToRecipe.objects.filter(recipe=instance)
+        }
+        old_amounts = {
+            ingredient_id: item.amount
+            for ingredient_id, item in existing.items()
+        }
+        new_amounts = {
+            ingredient['id'].pk: ingredient['amount']
+            for ingredient in ingredients
+        }
+        to_update = []
+        for ingredient_id, item in existing.items():
+            amount = new_amounts.get(ingredient_id)
+            if amount is not None and amount != item.amount:
+                item.amount = amount
+                to_update.append(item)
+        to_delete = [
+            item.pk for ingredient_id, item in existing.items()
+            if ingredient_id not in new_amounts
+        ]
+        to_create = [
+            IngredientToRecipe(
+                recipe=instance, ingredient_id=ingredient_id, amount=amount)
+            for ingredient_id, amount in new_amounts.items()
+            if ingredient_id not in existing
+        ]
+        if to_delete:
+            IngredientToRecipe.objects.filter(pk__in=to_delete).delete()
+        if to_update:
+            IngredientToRecipe.objects.bulk_update(to_update, ['amount'])
+        if to_create:
+            IngredientToRecipe.objects.bulk_create(to_create)
+        change_recipe_in_carts(instance, old_amounts, new_amounts)
+
     def to_representation(self, instance):
+        prefetch_related_objects(
+            [instance], *RecipeQuerySet.prefetch_lookups)
         serializer = RecipeSerializer(instance=instance, context=self.context)
         return serializer.data
 
 
 class SubscriptionSerializer(serializers.ModelSerializer):
     recipes = serializers.SerializerMethodField()
-    recipes_count = serializers.SerializerMethodField()
     is_subscribed = serializers.SerializerMethodField(read_only=True)
 
     class Meta:
         model = CustomUser
         fields = ('email', 'id', 'username', 'first_name',
-                  'last_name', 'is_subscribed', 'recipes', 'recipes_count')
-
-    def get_recipes_count(self, obj):
-        return Recipe.objects.filter(author=obj).count()
+                  'last_name', 'is_subscribed', 'recipes', 'recipes_count',
+                  'subscribers_count')
 
     def get_is_subscribed(self, obj):
-        user = self.context['request'].user
-        if user:
-            return Subscription.objects.filter(author=obj, user=user).exists()
-        return False
+        relations = get_relations(self.context['request'])
+        return obj.pk in relations.subscriptions
 
     def get_recipes(self, obj):
-        recipes = Recipe.objects.filter(author=obj)
+        if hasattr(obj, 'preview_recipes'):
+            recipes = obj.preview_recipes
+        else:
+            recipes = obj.recipes.all()
+            recipes_limit = self.context.get('recipes_limit')
+            if recipes_limit is not None:
+                recipes = recipes[:recipes_limit]
         serializer = RecipeFavoriteSerializer(recipes, many=True)
         return serializer.data
@@ -0,0 +1,25 @@
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from users.models import CustomUser
+
+from .authentication import token_cache
+
+
+@receiver(post_delete, sender=Token)
+def token_deleted(sender, instance, **kwargs):
+    transaction.on_commit(partial(token_cache.delete, [instance.key]))
+
+
+@receiver(post_save, sender=CustomUser)
+def user_changed(sender, instance, created, **kwargs):
+    if created:
+        return
+    keys = list(Token.objects.filter(
+        user=instance).values_list('key', flat=True))
+    if keys:
+        transaction.on_commit(partial(token_cache.delete, keys))
@@ -0,0 +1,160 @@
+from time import time
+
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase
+
+from recipes.catalog import OBJECT_VERSION_KEY, get_catalog_version
+from recipes.models import (FavoriteRecipe, Ingredient, IngredientToRecipe,
+                            Recipe, RecipeInShoppingList, Tag)
+from users.models import CustomUser
+
+from .authentication import token_cache
+
+
+class RecipeListQueriesTest(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_user(
+            username='reader', email='reader@example.com',
+            first_name='Тест', last_name='Читатель', password='password')
+        cls.token = Token.objects.create(user=cls.user)
+        author = CustomUser.objects.create_user(
+            username='author', email='author@example.com',
+            first_name='Тест', last_name='Автор', password='password')
+        tags = [
+            Tag.objects.create(name=f'Тег {index}', slug=f'tag-{index}')
+            for index in range(3)
+        ]
+        ingredients = [
+            Ingredient.objects.create(
+                name=f'Ингредиент {index}', measurement_unit='г')
+            for index in range(3)
+        ]
+        recipes = Recipe.objects.bulk_create([
+            Recipe(author=author, name=f'Рецепт {index:02}', text='Текст',
+                   cooking_time=10, image='recipes/images/test.jpg')
+            for index in range(60)
+        ])
+        for recipe in recipes:
+            recipe.tags.set(tags)
+        IngredientToRecipe.objects.bulk_create([
+            IngredientToRecipe(
+                recipe=recipe, ingredient=ingredient, amount=100)
+            for recipe in recipes
+            for ingredient in ingredients
+        ])
+        FavoriteRecipe.objects.bulk_create([
+            FavoriteRecipe(user=cls.user, recipe=recipe)
+            for recipe in recipes[::2]
+        ])
+        RecipeInShoppingList.objects.bulk_create([
+            RecipeInShoppingList(user=cls.user, recipe=recipe)
+            for recipe in recipes[::3]
+        ])
+
+    def count_queries(self, limit):
+        cache.clear()
+        token_cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/recipes/', {'limit': limit})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['results']), limit)
+        return len(queries)
+
+    def assert_constant_queries(self):
+        self.assertEqual(self.count_queries(6), self.count_queries(60))
+
+    def test_anonymous_queries_do_not_depend_on_page_size(self):
+        self.assert_constant_queries()
+
+    def test_authenticated_queries_do_not_depend_on_page_size(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+        self.assert_constant_queries()
+
+
+class TokenRevocationTest(APITestCase):
+
+    def setUp(self):
+        cache.clear()
+        token_cache.clear()
+        self.user = CustomUser.objects.create_user(
+            username='reader', email='reader@example.com',
+            first_name='Тест', last_name='Читатель', password='password')
+        self.token = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+    def test_revocation_marker_overrides_local_entry(self):
+        self.assertEqual(self.client.get('/api/users/me/').status_code, 200)
+        self.assertIsNotNone(token_cache.get_local(self.token.key))
+        CustomUser.objects.filter(pk=self.user.pk).update(is_active=False)
+        cache.set(token_cache.get_revoked_key(self.token.key), time())
+        self.assertEqual(self.client.get('/api/users/me/').status_code, 401)
+
+
+class ObjectVersionTest(APITestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    def test_missing_recipe_does_not_create_version_key(self):
+        response = self.client.get('/api/recipes/987654321/')
+        self.assertEqual(response.status_code, 404)
+        self.assertIsNone(cache.get(OBJECT_VERSION_KEY.format(
+            label=Recipe._meta.label_lower, pk=987654321)))
+
+    def test_anonymous_retrieve_is_cached_per_recipe(self):
+        author = CustomUser.objects.create_user(
+            username='author', email='author@example.com',
+            first_name='Тест', last_name='Автор', password='password')
+        recipe = Recipe.objects.create(
+            author=author, name='Рецепт', text='Текст', cooking_time=10,
+            image='recipes/images/test.jpg')
+        cache.clear()
+        self.assertEqual(
+            self.client.get(f'/api/recipes/{recipe.pk}/').status_code, 200)
+        self.assertEqual(
+            self.client.get(f'/api/recipes/{recipe.pk + 1}/').status_code,
+            404)
+
+
+class CatalogVersionTest(APITestCase):
+
+    def test_catalog_version_is_bumped_after_commit(self):
+        version = get_catalog_version(Tag)
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            Tag.objects.create(name='Завтрак', slug='breakfast')
+            self.assertEqual(get_catalog_version(Tag), version)
+        self.assertEqual(len(callbacks), 1)
+        self.assertNotEqual(get_catalog_version(Tag), version)
+
+
+class AuthorChangeTest(APITestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.author = CustomUser.objects.create_user(
+            username='author', email='author@example.com',
+            first_name='Тест', last_name='Автор', password='password')
+        self.recipe = Recipe.objects.create(
+            author=self.author, name='Рецепт', text='Текст', cooking_time=10,
+            image='recipes/images/test.jpg')
+        self.url = f'/api/recipes/{self.recipe.pk}/'
+
+    def test_author_change_invalidates_recipe_responses(self):
+        etag = self.client.get(self.url)['ETag']
+        self.assertEqual(
+            self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code,
+            304)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.author.first_name = 'Новое'
+            self.author.save(update_fields=['first_name'])
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['author']['first_name'], 'Новое')
+        response = self.client.get('/api/recipes/')
+        self.assertEqual(
+            response.data['results'][0]['author']['first_name'], 'Новое')
@@ -1,18 +1,31 @@
-from django.db.models import Exists, OuterRef, Sum
-from django.http import HttpResponse
+from django.db import transaction
+from django.db.models import Exists, OuterRef, Prefetch
+from django.http import StreamingHttpResponse
 from rest_framework import mixins, permissions, status, viewsets
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
 
-from recipes.models import (FavoriteRecipe, Ingredient, IngredientToRecipe,
-                            Recipe, RecipeInShoppingList, Tag)
+from recipes.cart import (add_recipes_to_cart, lock_recipes, lock_users,
+                          remove_recipe_from_carts, remove_recipes_from_cart)
+from recipes.counters import change_counter, change_counters
+from recipes.models import (FavoriteRecipe, Ingredient, Recipe,
+                            RecipeInShoppingList, ShoppingCartIngredient, Tag)
 from users.models import CustomUser, Subscription
 
-from .paginations import CustomPagination
+from .mixins import (AnonymousCacheMixin, CatalogCacheMixin,
+                     ConditionalResponseMixin)
+from .paginations import CustomPagination, KeysetPagination
 from .permissions import IsAuthorOrReadOnly
+from .renderers import (ShoppingCartCSVRenderer, ShoppingCartJSONRenderer,
+                        ShoppingCartTextRenderer)
+from .relations import invalidate_relations
+from .search import ingredient_index
 from .serializers import (AuthorSerializer, FavoriteSerializer,
                           IngredientSerializer, RecipeCreateSerializer,
-                          RecipeInShoppingListSerializer, RecipeSerializer,
+                          RecipeIdsSerializer, RecipeInShoppingListSerializer,
+                          RecipeSerializer, ShoppingCartIngredientSerializer,
                           SubscriptionSerializer, TagSerializer)
 
 
@@ -21,6 +34,18 @@ class SubscriptionViewSet(mixins.RetrieveModelMixin, viewsets.GenericViewSet):
     serializer_class = SubscriptionSerializer
     permission_classes = (permissions.IsAuthenticated,)
     pagination_class = CustomPagination
+    cursor_ordering = ('username', 'id')
+
+    def get_recipes_limit(self):
+        recipes_limit = self.request.query_params.get('recipes_limit')
+        if recipes_limit and recipes_limit.isdigit():
+            return int(recipes_limit)
+        return None
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['recipes_limit'] = self.get_recipes_limit()
+        return context
 
     @action(detail=True,
             methods=["POST", "DELETE"], url_path="subscribe",
@@ -33,9 +58,15 @@ class SubscriptionViewSet(mixins.RetrieveModelMixin, viewsets.GenericViewSet):
                     {'error': 'Нельзя подписаться на самого себя'},
                     status=status.HTTP_400_BAD_REQUEST
                 )
-            subscription, created = Subscription.objects.get_or_create(
-                author=author, user=request.user)
+            with transaction.atomic():
+                subscription, created = Subscription.objects.get_or_create(
+                    author=author, user=request.user)
+                if created:
+                    change_counter(
+                        CustomUser, author.pk, 'subscribers_count', 1)
             if created:
+                invalidate_relations(request)
+                author.refresh_from_db(fields=['subscribers_count'])
                 serializer = self.get_serializer_class()(
                     instance=author, context=self.get_serializer_context())
                 return Response(
@@ -43,10 +74,14 @@ class SubscriptionViewSet(mixins.RetrieveModelMixin, viewsets.GenericViewSet):
             return Response(
                 {'error': 'Подписка уже оформлена'},
                 status=status.HTTP_400_BAD_REQUEST)
-        subscription = Subscription.objects.filter(
-            author=author, user=request.user)
-        if subscription.exists():
-            subscription.delete()
+        with transaction.atomic():
+            deleted, _ = Subscription.objects.filter(
+                author=author, user=request.user).delete()
+            if deleted:
+                change_counter(
+                    CustomUser, author.pk, 'subscribers_count', -1)
+        if deleted:
+            invalidate_relations(request)
             return Response(status=status.HTTP_204_NO_CONTENT)
         return Response(
             {'error': 'Вы не являетесь подписчиком данного пользователя'},
@@ -57,7 +92,15 @@ class SubscriptionViewSet(mixins.RetrieveModelMixin, viewsets.GenericViewSet):
             methods=['GET'], url_path="subscriptions",
             permission_classes=[permissions.IsAuthenticated])
     def subscriptions(self, request, *args, **kwargs):
-        queryset = self.get_queryset().filter(subscribers__user=request.user)
+        recipes = Recipe.objects.all()
+        recipes_limit = self.get_recipes_limit()
+        if recipes_limit is not None:
+            recipes = recipes[:recipes_limit]
+        queryset = self.get_queryset().filter(
+            subscribers__user=request.user
+        ).prefetch_related(
+            Prefetch('recipes', queryset=recipes, to_attr='preview_recipes')
+        )
         page = self.paginate_queryset(queryset)
         serializer = self.get_serializer(page, many=True)
         return self.get_paginated_response(serializer.data)
@@ -71,7 +114,8 @@ class SubscriptionViewSet(mixins.RetrieveModelMixin, viewsets.GenericViewSet):
         return Response(serializer.data, status=status.HTTP_200_OK)
 
 
-class TagViewSet(mixins.ListModelMixin,
+class TagViewSet(CatalogCacheMixin,
+                 mixins.ListModelMixin,
                  mixins.RetrieveModelMixin,
                  viewsets.GenericViewSet):
     queryset = Tag.objects.all()
@@ -79,26 +123,37 @@ class TagViewSet(mixins.ListModelMixin,
     pagination_class = None
 
 
-class IngredientViewSet(mixins.ListModelMixin,
+class IngredientViewSet(CatalogCacheMixin,
+                        mixins.ListModelMixin,
                         mixins.RetrieveModelMixin,
                         viewsets.GenericViewSet):
     queryset = Ingredient.objects.all()
     serializer_class = IngredientSerializer
     pagination_class = None
 
-    def get_queryset(self):
-        queryset = super().get_queryset()
+    def get_catalog_data(self, version):
         name = self.request.query_params.get('name')
         if name:
-            queryset = queryset.filter(name__startswith=name)
-        return queryset
+            return ingredient_index.search(name)
+        return super().get_catalog_data(version)
 
 
-class RecipeViewSet(viewsets.ModelViewSet):
-    queryset = Recipe.objects.all()
+class RecipeViewSet(AnonymousCacheMixin, ConditionalResponseMixin,
+                    viewsets.ModelViewSet):
+    queryset = Recipe.objects.with_related()
     serializer_class = RecipeSerializer
     permission_classes = (IsAuthorOrReadOnly,)
     pagination_class = CustomPagination
+    cursor_ordering = ('name', 'id')
+    conditional_fields = ('favorites_count', 'in_carts_count')
+    related_catalogs = (Ingredient, Tag)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        if (self.action == 'download_shopping_cart'
+                and getattr(response, 'exception', False)):
+            request.accepted_renderer = JSONRenderer()
+            request.accepted_media_type = JSONRenderer.media_type
+        return super().finalize_response(request, response, *args, **kwargs)
 
     def get_serializer_class(self):
         if self.action in ('create', 'update', 'partial_update'):
@@ -107,101 +162,215 @@ class RecipeViewSet(viewsets.ModelViewSet):
             return FavoriteSerializer
         if self.action == 'shopping_cart':
             return RecipeInShoppingListSerializer
+        if self.action in ('favorite_bulk', 'shopping_cart_bulk'):
+            return RecipeIdsSerializer
         return RecipeSerializer
 
     def perform_create(self, serializer):
-        serializer.save(author=self.request.user)
+        with transaction.atomic():
+            serializer.save(author=self.request.user)
+            change_counter(
+                CustomUser, self.request.user.pk, 'recipes_count', 1)
+
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            if not lock_recipes([instance.pk]):
+                return
+            remove_recipe_from_carts(instance)
+            instance.delete()
+            change_counter(
+                CustomUser, instance.author_id, 'recipes_count', -1)
 
-    def create_or_delete(self, request, model, pk=None):
+    def create_or_delete(self, request, model, counter, pk=None,
+                         on_create=None, on_delete=None):
         user = self.request.user
         recipe = self.get_object()
         queryset = model.objects.filter(user=user, recipe=recipe)
         if request.method == 'POST':
-            if queryset.exists():
+            with transaction.atomic():
+                lock_recipes([recipe.pk])
+                lock_users([user.pk])
+                obj, created = model.objects.get_or_create(
+                    user=user, recipe=recipe)
+                if created:
+                    change_counter(Recipe, recipe.pk, counter, 1)
+                    if on_create:
+                        on_create(user, [recipe])
+            if not created:
                 return Response(
                     {'error': 'Рецепт уже находится в списке.'},
                     status=status.HTTP_400_BAD_REQUEST)
-            obj = model.objects.create(user=user, recipe=recipe)
+            invalidate_relations(request)
             serializer = self.get_serializer(obj)
             return Response(
                 serializer.data, status=status.HTTP_201_CREATED)
-        if queryset.exists():
-            queryset.delete()
+        with transaction.atomic():
+            lock_recipes([recipe.pk])
+            lock_users([user.pk])
+            deleted, _ = queryset.delete()
+            if deleted:
+                change_counter(Recipe, recipe.pk, counter, -1)
+                if on_delete:
+                    on_delete(user, [recipe])
+        if deleted:
+            invalidate_relations(request)
             return Response(status=status.HTTP_204_NO_CONTENT)
         return Response(
             {'error': 'Рецепт не находится в списке.'},
             status=status.HTTP_400_BAD_REQUEST)
 
+    def bulk_create_or_delete(self, request, model, counter,
+                              on_create=None, on_delete=None):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        ids = serializer.validated_data['ids']
+        user = request.user
+        with transaction.atomic():
+            found = set(lock_recipes(ids))
+            lock_users([user.pk])
+            queryset = model.objects.filter(user=user, recipe_id__in=found)
+            current = set(queryset.values_list('recipe_id', flat=True))
+            if request.method == 'POST':
+                changed = found - current
+                unchanged_status, changed_status = 'exists', 'added'
+                model.objects.bulk_create([
+                    model(user=user, recipe_id=recipe_id)
+                    for recipe_id in changed
+                ])
+                handler, delta = on_create, 1
+            else:
+                changed = current
+                unchanged_status, changed_status = 'absent', 'removed'
+                queryset.delete()
+                handler, delta = on_delete, -1
+            if changed:
+                change_counters(Recipe, changed, counter, delta)
+                if handler:
+                    handler(user, changed)
+        if changed:
+            invalidate_relations(request)
+        return Response([
+            {
+                'id': recipe_id,
+                'status': (
+                    'not_found' if recipe_id not in found
+                    else changed_status if recipe_id in changed
+                    else unchanged_status
+                ),
+            }
+            for recipe_id in ids
+        ])
+
     @action(detail=True,
             methods=['post', 'delete'],
             permission_classes=[permissions.IsAuthenticated])
     def favorite(self, request, pk=None):
-        return self.create_or_delete(request, model=FavoriteRecipe, pk=pk)
+        return self.create_or_delete(
+            request, model=FavoriteRecipe, pk=pk, counter='favorites_count')
 
     @action(detail=True,
             methods=['post', 'delete'],
             permission_classes=[permissions.IsAuthenticated])
     def shopping_cart(self, request, pk=None):
         return self.create_or_delete(
-            request, model=RecipeInShoppingList, pk=pk
+            request, model=RecipeInShoppingList, pk=pk,
+            counter='in_carts_count',
+            on_create=add_recipes_to_cart, on_delete=remove_recipes_from_cart
         )
 
     @action(detail=False,
-            methods=['GET'],
+            methods=['post', 'delete'], url_path='favorite',
+            url_name='favorite-bulk',
+            permission_classes=[permissions.IsAuthenticated])
+    def favorite_bulk(self, request):
+        return self.bulk_create_or_delete(
+            request, model=FavoriteRecipe, counter='favorites_count')
+
+    @action(detail=False,
+            methods=['post', 'delete'], url_path='shopping_cart',
+            url_name='shopping-cart-bulk',
             permission_classes=[permissions.IsAuthenticated])
+    def shopping_cart_bulk(self, request):
+        return self.bulk_create_or_delete(
+            request, model=RecipeInShoppingList, counter='in_carts_count',
+            on_create=add_recipes_to_cart, on_delete=remove_recipes_from_cart
+        )
+
+    @action(detail=False,
+            methods=['GET'],
+            permission_classes=[permissions.IsAuthenticated],
+            renderer_classes=[ShoppingCartTextRenderer,
+                              ShoppingCartCSVRenderer,
+                              ShoppingCartJSONRenderer])
     def download_shopping_cart(self, request):
-        ingredients = IngredientToRecipe.objects.filter(
-            recipe__recipeinshoppinglist__user=request.user).values(
-            'ingredient__name', 'ingredient__measurement_unit').annotate(
-            quantity=Sum('amount'))
-        result = []
-        for ingredient in ingredients:
-            name = ingredient['ingredient__name']
-            unit = ingredient['ingredient__measurement_unit']
-            quantity = ingredient['quantity']
-            result.append(f'{name} ({unit}) - {quantity}')
-
-        file_data = '\n'.join(result).encode('utf-8')
-        response = HttpResponse(file_data, content_type='text/plain')
+        ingredients = self.get_cart_ingredients().values_list(
+            'ingredient__name', 'ingredient__measurement_unit', 'amount')
+        renderer = request.accepted_renderer
+        response = StreamingHttpResponse(
+            renderer.stream(ingredients.iterator(chunk_size=2000)),
+            content_type=f'{renderer.media_type}; charset={renderer.charset}'
+        )
         response['Content-Disposition'] = (
-            'attachment; filename=shopping_cart.txt')
+            f'attachment; filename=shopping_cart.{renderer.format}')
         return response
 
+    @action(detail=False,
+            methods=['GET'],
+            permission_classes=[permissions.IsAuthenticated])
+    def shopping_cart_preview(self, request):
+        serializer = ShoppingCartIngredientSerializer(
+            self.get_cart_ingredients().select_related('ingredient'),
+            many=True
+        )
+        return Response(serializer.data)
+
+    def get_cart_ingredients(self):
+        return ShoppingCartIngredient.objects.filter(
+            user=self.request.user
+        ).order_by('ingredient__name', 'ingredient__measurement_unit')
+
     def get_queryset(self):
         queryset = super().get_queryset()
         author = self.request.query_params.get('author')
         tags = self.request.query_params.getlist('tags')
+        tags_all = self.request.query_params.getlist('tags_all')
         is_favorited = self.request.query_params.get('is_favorited')
         is_in_shopping_cart = self.request.query_params.get(
             'is_in_shopping_cart')
         slug = self.request.query_params.get('tag_slug')
+        search = self.request.query_params.get('search')
         if author:
             queryset = queryset.filter(author_id=int(author))
 
-        if tags is not None and len(tags):
-            queryset = queryset.filter(tags__slug__in=tags)
+        if tags:
+            queryset = queryset.with_tags(tags)
 
-        if self.request.user.is_authenticated:
-            if is_favorited == '1':
-                user = self.request.user
-                queryset = queryset.annotate(
-                    is_favorited=Exists(
-                        FavoriteRecipe.objects.filter(
-                            user=user, recipe=OuterRef('pk'))
-                    )
-                ).filter(is_favorited=True)
+        if slug:
+            tags_all.append(slug)
+        if tags_all:
+            queryset = queryset.with_tags(tags_all, match_all=True)
 
+        user = self.request.user
+        if user.is_authenticated:
+            if is_favorited == '1':
+                queryset = queryset.filter(Exists(
+                    FavoriteRecipe.objects.filter(
+                        user=user, recipe=OuterRef('pk'))
+                ))
             if is_in_shopping_cart == '1':
-                user = self.request.user
-                queryset = queryset.annotate(
-                    is_in_shopping_cart=Exists(
-                        RecipeInShoppingList.objects.filter(
-                            user=user, recipe=OuterRef('pk')
-                        )
-                    )
-                ).filter(is_in_shopping_cart=True)
+                queryset = queryset.filter(Exists(
+                    RecipeInShoppingList.objects.filter(
+                        user=user, recipe=OuterRef('pk'))
+                ))
 
-        if slug:
-            queryset = queryset.filter(tags__slug=slug)
+        if search:
+            if KeysetPagination.cursor_query_param in (
+                    self.request.query_params):
+                raise ValidationError({
+                    'cursor': 'Курсорная пагинация несовместима с поиском, '
+                              'результаты которого упорядочены по '
+                              'релевантности.'
+                })
+            queryset = queryset.search(search)
 
-        return queryset.distinct()
+        return queryset
@@ -0,0 +1,257 @@
+import json
+import os
+import threading
+from bisect import bisect_left
+from collections import defaultdict
+from contextvars import ContextVar
+from pathlib import Path
+from time import monotonic, perf_counter
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.http import HttpResponse
+
+PREFIX = 'foodgram'
+DURATION_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+METRICS = {
+    'http_requests_total': (
+        'counter', 'Количество обработанных запросов'),
+    'http_request_duration_seconds': (
+        'histogram', 'Время обработки запроса'),
+    'db_queries_per_request': (
+        'histogram', 'Количество SQL-запросов на один запрос'),
+    'db_queries_total': (
+        'counter', 'Количество SQL-запросов'),
+    'db_query_duration_seconds_total': (
+        'counter', 'Суммарное время SQL-запросов'),
+    'relations_cache_total': (
+        'counter', 'Обращения к кэшу связей пользователя'),
+}
+
+
+class MetricsStore:
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counters = defaultdict(float)
+        self.histograms = {}
+        self.flushed = monotonic()
+
+    def inc(self, name, labels, value=1):
+        with self.lock:
+            self.counters[name, labels] += value
+
+    def observe(self, name, labels, value, buckets):
+        with self.lock:
+            histogram = self.histograms.get((name, labels))
+            if histogram is None:
+                histogram = self.histograms[name, labels] = {
+                    'buckets': list(buckets),
+                    'counts': [0] * (len(buckets) + 1),
+                    'sum': 0,
+                }
+            histogram['counts'][bisect_left(buckets, value)] += 1
+            histogram['sum'] += value
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                'counters': [
+                    [name, list(labels), value]
+                    for (name, labels), value in self.counters.items()
+                ],
+                'histograms': [
+                    [name, list(labels), {
+                        **histogram, 'counts': list(histogram['counts'])
+                    }]
+                    for (name, labels), histogram in self.histograms.items()
+                ],
+            }
+
+    def flush(self, force=False):
+        directory = getattr(settings, 'METRICS_DIR', '')
+        interval = getattr(settings, 'METRICS_FLUSH_INTERVAL', 5)
+        if not directory or (
+                not force and monotonic() - self.flushed < interval):
+            return
+        self.flushed = monotonic()
+        path = Path(directory) / f'{os.getpid()}.json'
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temporary = path.with_name(
+            f'{os.getpid()}.{threading.get_ident()}.tmp')
+        temporary.write_text(json.dumps(self.snapshot()))
+        os.replace(temporary, path)
+
+
+store = MetricsStore()
+
+
+def collect():
+    directory = getattr(settings, 'METRICS_DIR', '')
+    if not directory:
+        return [store.snapshot()]
+    store.flush(force=True)
+    snapshots = []
+    for path in Path(directory).glob('*.json'):
+        try:
+            snapshots.append(json.loads(path.read_text()))
+        except (OSError, ValueError):
+            continue
+    return snapshots
+
+
+def merge(snapshots):
+    counters = defaultdict(float)
+    histograms = {}
+    for snapshot in snapshots:
+        for name, labels, value in snapshot['counters']:
+            counters[name, tuple(map(tuple, labels))] += value
+        for name, labels, histogram in snapshot['histograms']:
+            key = name, tuple(map(tuple, labels))
+            merged = histograms.setdefault(key, {
+                'buckets': histogram['buckets'],
+                'counts': [0] * len(histogram['counts']),
+                'sum': 0,
+            })
+            for index, count in enumerate(histogram['counts']):
+                merged['counts'][index] += count
+            merged['sum'] += histogram['sum']
+    return counters, histograms
+
+
+def format_labels(labels, **extra):
+    pairs = [*labels, *extra.items()]
+    return '{%s}' % ','.join(
+        '{}="{}"'.format(
+            name,
+            str(value).replace('\\', r'\\').replace('"', r'\"')
+        )
+        for name, value in pairs
+    )
+
+
+def render(snapshots):
+    counters, histograms = merge(snapshots)
+    lines = []
+    for name, (kind, description) in METRICS.items():
+        metric = f'{PREFIX}_{name}'
+        lines += [f'# HELP {metric} {description}', f'# TYPE {metric} {kind}']
+        for (counter, labels), value in sorted(counters.items()):
+            if counter == name:
+                lines.append(f'{metric}{format_labels(labels)} {value:g}')
+        for (histogram, labels), data in sorted(
+                histograms.items(), key=lambda item: item[0]):
+            if histogram != name:
+                continue
+            total = 0
+            for bound, count in zip(
+                    [*data['buckets'], '+Inf'], data['counts']):
+                total += count
+                lines.append(
+                    f'{metric}_bucket{format_labels(labels, le=bound)} '
+                    f'{total}')
+            lines.append(f'{metric}_sum{format_labels(labels)} '
+                         f'{data["sum"]:g}')
+            lines.append(f'{metric}_count{format_labels(labels)} {total}')
+    return '\n'.join(lines) + '\n'
+
+
+class QueryCounter:
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0
+
+
+current_queries = ContextVar('current_queries', default=None)
+
+
+def count_queries(execute, sql, params, many, context):
+    queries = current_queries.get()
+    if queries is None:
+        return execute(sql, params, many, context)
+    start = perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        queries.count += 1
+        queries.duration += perf_counter() - start
+
+
+def install_query_counter(connection, **kwargs):
+    if count_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.append(count_queries)
+
+
+connection_created.connect(install_query_counter)
+
+
+def get_route(request):
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unmatched'
+    return match.url_name or match.view_name or 'unnamed'
+
+
+def record(request, response, duration, queries):
+    route = (('route', get_route(request)), ('method', request.method))
+    store.inc('http_requests_total', (
+        *route, ('status', response.status_code)))
+    store.observe(
+        'http_request_duration_seconds', route, duration, DURATION_BUCKETS)
+    store.observe(
+        'db_queries_per_request', route, queries.count, QUERY_BUCKETS)
+    store.inc('db_queries_total', route, queries.count)
+    store.inc('db_query_duration_seconds_total', route, queries.duration)
+    store.flush()
+
+
+class MetricsMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+        for connection in connections.all():
+            install_query_counter(connection)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        if not getattr(settings, 'METRICS_ENABLED', True):
+            return self.get_response(request)
+        queries = QueryCounter()
+        token = current_queries.set(queries)
+        start = perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            current_queries.reset(token)
+        record(request, response, perf_counter() - start, queries)
+        return response
+
+    async def __acall__(self, request):
+        if not getattr(settings, 'METRICS_ENABLED', True):
+            return await self.get_response(request)
+        queries = QueryCounter()
+        token = current_queries.set(queries)
+        start = perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_queries.reset(token)
+        record(request, response, perf_counter() - start, queries)
+        return response
+
+
+def metrics_view(request):
+    return HttpResponse(
+        render(collect()),
+        content_type='text/plain; version=0.0.4; charset=utf-8')
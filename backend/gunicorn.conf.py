@@ -0,0 +1,23 @@
+import os
+import shutil
+from tempfile import gettempdir
+
+if os.getenv('SERVER_MODE', 'wsgi') == 'asgi':
+    wsgi_app = 'backend.asgi:application'
+    worker_class = 'uvicorn.workers.UvicornWorker'
+else:
+    wsgi_app = 'backend.wsgi:application'
+
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:8000')
+workers = int(os.getenv('GUNICORN_WORKERS', 2))
+keepalive = int(os.getenv('GUNICORN_KEEPALIVE', 75))
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 30))
+
+metrics_dir = os.environ.setdefault(
+    'METRICS_DIR', os.path.join(gettempdir(), 'foodgram-metrics'))
+
+
+def on_starting(server):
+    if metrics_dir:
+        shutil.rmtree(metrics_dir, ignore_errors=True)
+        os.makedirs(metrics_dir, exist_ok=True)
@@ -0,0 +1,14 @@
+from django.contrib import admin
+
+from .models import Job
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = (
+        'pk', 'name', 'queue', 'status', 'attempts', 'created', 'finished')
+    list_filter = ('status', 'queue')
+    search_fields = ('name',)
+    readonly_fields = (
+        'attempts', 'created', 'started', 'finished', 'worker', 'error')
+    show_full_result_count = False
@@ -0,0 +1,52 @@
+import os
+import signal
+import socket
+import time
+from datetime import timedelta
+
+from django.core.management import BaseCommand
+from django.db import close_old_connections
+
+from jobs.queue import claim_job, requeue_stale_jobs, run_job
+
+
+class Command(BaseCommand):
+    help = 'Обработчик фоновых задач'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--queue', action='append', dest='queues',
+            help='Обрабатывать только указанные очереди')
+        parser.add_argument(
+            '--sleep', type=float, default=1.0,
+            help='Пауза между опросами пустой очереди, секунд')
+        parser.add_argument(
+            '--stale-after', type=int, default=600,
+            help='Через сколько секунд зависшая задача вернётся в очередь')
+        parser.add_argument(
+            '--burst', action='store_true',
+            help='Завершиться, когда очередь опустеет')
+
+    def stop(self, *args):
+        self.running = False
+
+    def handle(self, *args, **options):
+        worker = f'{socket.gethostname()}:{os.getpid()}'
+        stale_after = timedelta(seconds=options['stale_after'])
+        self.running = True
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+        processed = 0
+        while self.running:
+            close_old_connections()
+            requeue_stale_jobs(stale_after)
+            job = claim_job(worker, options['queues'])
+            if job is None:
+                if options['burst']:
+                    break
+                time.sleep(options['sleep'])
+                continue
+            status = run_job(job)
+            processed += 1
+            self.stdout.write(f'{job.name} #{job.pk}: {status}')
+        self.stdout.write(self.style.SUCCESS(f'Jobs processed: {processed}'))
@@ -0,0 +1,23 @@
+# Generated by Django 4.2.4 on 2026-10-17 04:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QueueLock',
+            fields=[
+                ('queue', models.CharField(max_length=50, primary_key=True, serialize=False, verbose_name='Очередь')),
+            ],
+            options={
+                'verbose_name': 'Блокировка очереди',
+                'verbose_name_plural': 'Блокировки очередей',
+            },
+        ),
+    ]
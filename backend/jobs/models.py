@@ -0,0 +1,64 @@
+from django.db import models
+from django.utils import timezone
+
+
+class Job(models.Model):
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUSES = (
+        (PENDING, 'В очереди'),
+        (RUNNING, 'Выполняется'),
+        (DONE, 'Выполнена'),
+        (FAILED, 'Ошибка'),
+    )
+
+    name = models.CharField(max_length=200, verbose_name='Задача')
+    queue = models.CharField(
+        max_length=50, default='default', verbose_name='Очередь')
+    kwargs = models.JSONField(default=dict, verbose_name='Аргументы')
+    status = models.CharField(
+        max_length=10, choices=STATUSES, default=PENDING,
+        verbose_name='Статус')
+    attempts = models.PositiveIntegerField(
+        default=0, verbose_name='Попыток')
+    max_attempts = models.PositiveIntegerField(
+        default=3, verbose_name='Максимум попыток')
+    run_after = models.DateTimeField(
+        default=timezone.now, verbose_name='Запустить после')
+    created = models.DateTimeField(
+        auto_now_add=True, verbose_name='Создана')
+    started = models.DateTimeField(
+        null=True, blank=True, verbose_name='Запущена')
+    finished = models.DateTimeField(
+        null=True, blank=True, verbose_name='Завершена')
+    worker = models.CharField(
+        max_length=100, blank=True, verbose_name='Обработчик')
+    error = models.TextField(blank=True, verbose_name='Ошибка')
+
+    class Meta:
+        verbose_name = 'Фоновая задача'
+        verbose_name_plural = 'Фоновые задачи'
+        ordering = ('-created',)
+        indexes = [
+            models.Index(
+                fields=['status', 'queue', 'run_after'],
+                name='job_pending_idx'
+            )
+        ]
+
+    def __str__(self):
+        return f'{self.name} #{self.pk} ({self.status})'
+
+
+class QueueLock(models.Model):
+    queue = models.CharField(
+        max_length=50, primary_key=True, verbose_name='Очередь')
+
+    class Meta:
+        verbose_name = 'Блокировка очереди'
+        verbose_name_plural = 'Блокировки очередей'
+
+    def __str__(self):
+        return self.queue
@@ -0,0 +1,134 @@
+import logging
+import traceback
+from datetime import timedelta
+from functools import partial
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import Count, F
+from django.utils import timezone
+
+from .models import Job, QueueLock
+
+logger = logging.getLogger(__name__)
+
+tasks = {}
+
+STALE_JOB_ERROR = 'Worker did not finish the job'
+
+
+def task(queue='default', max_attempts=3):
+    def register(func):
+        name = f'{func.__module__}.{func.__name__}'
+        tasks[name] = func
+        func.queue = queue
+        func.max_attempts = max_attempts
+        func.delay = partial(enqueue, name)
+        return func
+    return register
+
+
+def enqueue(name, **kwargs):
+    func = tasks[name]
+    if getattr(settings, 'JOBS_EAGER', False):
+        func(**kwargs)
+        return None
+    return Job.objects.create(
+        name=name, queue=func.queue, kwargs=kwargs,
+        max_attempts=func.max_attempts)
+
+
+def get_queue_limits(queues=None):
+    limits = getattr(settings, 'JOBS_QUEUE_CONCURRENCY', {})
+    return {
+        queue: limit for queue, limit in limits.items()
+        if not queues or queue in queues
+    }
+
+
+def lock_queues(queues):
+    queues = sorted(queues)
+    if not queues:
+        return
+    locks = QueueLock.objects.select_for_update().filter(
+        queue__in=queues).order_by('queue')
+    if len(locks) < len(queues):
+        QueueLock.objects.bulk_create(
+            [QueueLock(queue=queue) for queue in queues],
+            ignore_conflicts=True)
+        list(locks.all())
+
+
+def get_saturated_queues(limits=None):
+    if limits is None:
+        limits = get_queue_limits()
+    if not limits:
+        return []
+    running = Job.objects.filter(
+        status=Job.RUNNING, queue__in=limits
+    ).values('queue').annotate(total=Count('pk')).order_by()
+    return [
+        row['queue'] for row in running
+        if row['total'] >= limits[row['queue']]
+    ]
+
+
+def requeue_stale_jobs(timeout):
+    now = timezone.now()
+    stale = Job.objects.filter(status=Job.RUNNING, started__lt=now - timeout)
+    stale.filter(attempts__gte=F('max_attempts')).update(
+        status=Job.FAILED, worker='', finished=now,
+        error=STALE_JOB_ERROR)
+    return stale.update(status=Job.PENDING, worker='')
+
+
+def claim_job(worker, queues=None):
+    limits = get_queue_limits(queues)
+    jobs = Job.objects.filter(
+        status=Job.PENDING, run_after__lte=timezone.now()
+    ).order_by('run_after', 'pk')
+    if queues:
+        jobs = jobs.filter(queue__in=queues)
+    if connections[jobs.db].features.has_select_for_update_skip_locked:
+        jobs = jobs.select_for_update(skip_locked=True)
+    with transaction.atomic():
+        lock_queues(limits)
+        job = jobs.exclude(
+            queue__in=get_saturated_queues(limits)).first()
+        if job is None:
+            return None
+        Job.objects.filter(pk=job.pk).update(
+            status=Job.RUNNING, worker=worker, started=timezone.now(),
+            attempts=F('attempts') + 1)
+    job.refresh_from_db()
+    return job
+
+
+def run_job(job):
+    if job.attempts > job.max_attempts:
+        job.status = Job.FAILED
+        job.error = job.error or STALE_JOB_ERROR
+        job.finished = timezone.now()
+        job.save(update_fields=('status', 'error', 'finished'))
+        return job.status
+    func = tasks.get(job.name)
+    try:
+        if func is None:
+            raise LookupError(f'Unknown task {job.name}')
+        func(**job.kwargs)
+    except Exception:
+        logger.exception('Job %s failed', job.pk)
+        job.error = traceback.format_exc()
+        if job.attempts < job.max_attempts:
+            job.status = Job.PENDING
+            job.run_after = timezone.now() + timedelta(
+                seconds=2 ** job.attempts)
+        else:
+            job.status = Job.FAILED
+            job.finished = timezone.now()
+    else:
+        job.status = Job.DONE
+        job.error = ''
+        job.finished = timezone.now()
+    job.save(update_fields=('status', 'error', 'run_after', 'finished'))
+    return job.status
@@ -1,4 +1,6 @@
 from django.contrib import admin
+from django.db.models.functions import Substr
+from django.utils.text import Truncator
 
 from recipes.models import (FavoriteRecipe, Ingredient, IngredientToRecipe,
                             Recipe, Tag)
@@ -7,10 +9,13 @@ from recipes.models import (FavoriteRecipe, Ingredient, IngredientToRecipe,
 @admin.register(Tag)
 class TagAdmin(admin.ModelAdmin):
     list_display = ('name', 'color', 'slug')
+    search_fields = ('name', 'slug')
 
 
 class IngredientInLine(admin.TabularInline):
     model = IngredientToRecipe
+    autocomplete_fields = ('ingredient',)
+    extra = 1
 
 
 @admin.register(Recipe)
@@ -19,28 +24,52 @@ class RecipeAdmin(admin.ModelAdmin):
         'author',
         'name',
         'image',
-        'text',
+        'short_text',
         'cooking_time',
-        'is_favorite'
+        'is_favorite',
+        'in_carts_count',
     )
-    list_filter = ('name', 'author', 'tags')
+    list_select_related = ('author',)
+    list_filter = ('tags',)
+    search_fields = ('name', 'author__username', 'author__email')
+    autocomplete_fields = ('author',)
     inlines = (IngredientInLine,)
+    show_full_result_count = False
+    text_preview_length = 50
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(
+            text_preview=Substr('text', 1, self.text_preview_length + 1)
+        ).defer('text', 'search_vector')
+
+    @admin.display(description='Описание')
+    def short_text(self, obj):
+        return Truncator(obj.text_preview).chars(self.text_preview_length)
+
+    @admin.display(description='В избранном', ordering='favorites_count')
     def is_favorite(self, obj):
-        return obj.favorite.count()
+        return obj.favorites_count
 
 
 @admin.register(Ingredient)
 class IngredientAdmin(admin.ModelAdmin):
     list_display = ('name', 'measurement_unit')
-    list_filter = ('name',)
+    search_fields = ('name',)
+    ordering = ('name',)
+    show_full_result_count = False
 
 
 @admin.register(IngredientToRecipe)
 class IngredientToRecipeAdmin(admin.ModelAdmin):
     list_display = ('recipe', 'ingredient', 'amount')
+    list_select_related = ('recipe', 'ingredient')
+    autocomplete_fields = ('recipe', 'ingredient')
+    show_full_result_count = False
 
 
 @admin.register(FavoriteRecipe)
 class FavoriteRecipeAdmin(admin.ModelAdmin):
     list_display = ('user', 'recipe')
+    list_select_related = ('user', 'recipe')
+    autocomplete_fields = ('user', 'recipe')
+    show_full_result_count = False
@@ -0,0 +1,134 @@
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import Sum
+
+from users.models import CustomUser
+
+from .models import (IngredientToRecipe, Recipe, RecipeInShoppingList,
+                     ShoppingCartIngredient)
+
+
+def get_recipe_amounts(*recipes):
+    return Counter(dict(
+        IngredientToRecipe.objects.filter(
+            recipe__in=recipes
+        ).values('ingredient_id').annotate(
+            total=Sum('amount')
+        ).values_list('ingredient_id', 'total').order_by()
+    ))
+
+
+def lock_recipes(recipe_ids):
+    return list(Recipe.objects.select_for_update().filter(
+        pk__in=recipe_ids).order_by('pk').values_list('pk', flat=True))
+
+
+def lock_users(user_ids):
+    list(CustomUser.objects.select_for_update().filter(
+        pk__in=user_ids).order_by('pk').values_list('pk', flat=True))
+
+
+def apply_cart_deltas(user_ids, deltas):
+    deltas = {
+        ingredient_id: delta
+        for ingredient_id, delta in deltas.items() if delta
+    }
+    if not deltas:
+        return
+    user_ids = list(user_ids)
+    if not user_ids:
+        return
+    with transaction.atomic():
+        lock_users(user_ids)
+        rows = ShoppingCartIngredient.objects.filter(
+            user_id__in=user_ids, ingredient_id__in=deltas)
+        existing = set()
+        to_update, to_delete = [], []
+        for row in rows:
+            existing.add((row.user_id, row.ingredient_id))
+            row.amount += deltas[row.ingredient_id]
+            if row.amount > 0:
+                to_update.append(row)
+            else:
+                to_delete.append(row.pk)
+        to_create = [
+            ShoppingCartIngredient(
+                user_id=user_id, ingredient_id=ingredient_id, amount=delta)
+            for user_id in user_ids
+            for ingredient_id, delta in deltas.items()
+            if delta > 0 and (user_id, ingredient_id) not in existing
+        ]
+        ShoppingCartIngredient.objects.bulk_update(to_update, ['amount'])
+        ShoppingCartIngredient.objects.filter(pk__in=to_delete).delete()
+        ShoppingCartIngredient.objects.bulk_create(to_create)
+
+
+def add_recipes_to_cart(user, recipes):
+    apply_cart_deltas([user.pk], get_recipe_amounts(*recipes))
+
+
+def remove_recipes_from_cart(user, recipes):
+    amounts = get_recipe_amounts(*recipes)
+    apply_cart_deltas([user.pk], {
+        ingredient_id: -amount for ingredient_id, amount in amounts.items()
+    })
+
+
+def get_cart_users(recipe):
+    return RecipeInShoppingList.objects.filter(
+        recipe=recipe).values_list('user_id', flat=True)
+
+
+def change_recipe_in_carts(recipe, old_amounts, new_amounts):
+    deltas = Counter(new_amounts)
+    deltas.subtract(old_amounts)
+    apply_cart_deltas(get_cart_users(recipe), deltas)
+
+
+def remove_recipe_from_carts(recipe):
+    change_recipe_in_carts(recipe, get_recipe_amounts(recipe), {})
+
+
+def compute_cart_totals(user_ids=None):
+    queryset = RecipeInShoppingList.objects.all()
+    if user_ids is not None:
+        queryset = queryset.filter(user_id__in=user_ids)
+    rows = queryset.values(
+        'user_id', 'recipe__ingredients_recipe__ingredient_id'
+    ).annotate(
+        total=Sum('recipe__ingredients_recipe__amount')
+    ).values_list(
+        'user_id', 'recipe__ingredients_recipe__ingredient_id', 'total'
+    ).order_by()
+    return {
+        (user_id, ingredient_id): total
+        for user_id, ingredient_id, total in rows
+        if ingredient_id is not None
+    }
+
+
+def get_stored_totals(user_ids=None):
+    queryset = ShoppingCartIngredient.objects.all()
+    if user_ids is not None:
+        queryset = queryset.filter(user_id__in=user_ids)
+    return {
+        (user_id, ingredient_id): amount
+        for user_id, ingredient_id, amount in queryset.values_list(
+            'user_id', 'ingredient_id', 'amount')
+    }
+
+
+def rebuild_cart_totals(user_ids=None, batch_size=1000):
+    totals = compute_cart_totals(user_ids)
+    with transaction.atomic():
+        queryset = ShoppingCartIngredient.objects.all()
+        if user_ids is not None:
+            queryset = queryset.filter(user_id__in=user_ids)
+        queryset.delete()
+        ShoppingCartIngredient.objects.bulk_create([
+            ShoppingCartIngredient(
+                user_id=user_id, ingredient_id=ingredient_id, amount=amount)
+            for (user_id, ingredient_id), amount in totals.items()
+        ], batch_size=batch_size)
+    return len(totals)
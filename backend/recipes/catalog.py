@@ -0,0 +1,49 @@
+from uuid import uuid4
+
+from django.core.cache import cache
+
+CATALOG_VERSION_KEY = 'catalog:version:{label}'
+OBJECT_VERSION_KEY = 'catalog:version:{label}:{pk}'
+OBJECT_VERSION_TIMEOUT = 60 * 60 * 24
+
+
+def _get_version(key):
+    version = cache.get(key)
+    if version is None:
+        version = uuid4().hex
+        cache.set(key, version, None)
+    return version
+
+
+def get_catalog_version(model):
+    return _get_version(
+        CATALOG_VERSION_KEY.format(label=model._meta.label_lower))
+
+
+def bump_catalog_version(model):
+    cache.set(
+        CATALOG_VERSION_KEY.format(label=model._meta.label_lower),
+        uuid4().hex,
+        None,
+    )
+
+
+def get_object_version(model, pk):
+    return get_object_versions(model, [pk])[0]
+
+
+def get_object_versions(model, pks):
+    label = model._meta.label_lower
+    keys = [OBJECT_VERSION_KEY.format(label=label, pk=pk) for pk in pks]
+    versions = cache.get_many(keys)
+    return [versions.get(key, '') for key in keys]
+
+
+def bump_object_versions(model, pks, catalog=True):
+    label = model._meta.label_lower
+    cache.set_many({
+        OBJECT_VERSION_KEY.format(label=label, pk=pk): uuid4().hex
+        for pk in pks
+    }, OBJECT_VERSION_TIMEOUT)
+    if catalog:
+        bump_catalog_version(model)
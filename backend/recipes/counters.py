@@ -0,0 +1,54 @@
+from functools import partial
+
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from users.models import CustomUser, Subscription
+
+from .catalog import bump_object_versions
+from .models import FavoriteRecipe, Recipe, RecipeInShoppingList
+
+COUNTERS = (
+    (Recipe, 'favorites_count', FavoriteRecipe, 'recipe'),
+    (Recipe, 'in_carts_count', RecipeInShoppingList, 'recipe'),
+    (CustomUser, 'recipes_count', Recipe, 'author'),
+    (CustomUser, 'subscribers_count', Subscription, 'author'),
+)
+
+
+def change_counter(model, pk, counter, delta):
+    change_counters(model, [pk], counter, delta)
+
+
+def change_counters(model, pks, counter, delta):
+    queryset = model.objects.filter(pk__in=pks)
+    if delta < 0:
+        queryset = queryset.filter(**{f'{counter}__gte': -delta})
+    queryset.update(**{counter: F(counter) + delta})
+    transaction.on_commit(partial(
+        bump_object_versions, model, list(pks), catalog=False))
+
+
+def count_related(source, field):
+    return Coalesce(Subquery(
+        source.objects.filter(
+            **{field: OuterRef('pk')}
+        ).order_by().values(field).annotate(
+            total=Count('pk')
+        ).values('total')
+    ), 0)
+
+
+def reconcile_counters():
+    fixed = {}
+    for model, counter, source, field in COUNTERS:
+        actual = count_related(source, field)
+        pks = list(model.objects.annotate(
+            actual=actual
+        ).exclude(**{counter: F('actual')}).values_list('pk', flat=True))
+        fixed[f'{model._meta.model_name}.{counter}'] = model.objects.filter(
+            pk__in=pks).update(**{counter: actual})
+        if pks:
+            bump_object_versions(model, pks)
+    return fixed
@@ -0,0 +1,69 @@
+from io import BytesIO
+from pathlib import PurePosixPath
+
+from django.core.files.base import ContentFile
+from django.utils import timezone
+from PIL import Image, ImageOps, features
+
+from .catalog import bump_object_versions
+
+MAX_IMAGE_PIXELS = 40_000_000
+VARIANTS = (
+    ('detail', (1280, 1280)),
+    ('card', (600, 600)),
+    ('thumbnail', (200, 200)),
+)
+VARIANT_FORMAT, VARIANT_EXTENSION = (
+    ('WEBP', 'webp') if features.check('webp') else ('JPEG', 'jpg'))
+VARIANT_QUALITY = 80
+VARIANTS_DIR = 'images/variants'
+
+
+def is_image_too_large(file):
+    position = file.tell()
+    try:
+        with Image.open(file) as image:
+            width, height = image.size
+    finally:
+        file.seek(position)
+    return width * height > MAX_IMAGE_PIXELS
+
+
+def render_variants(file):
+    with Image.open(file) as image:
+        width, height = image.size
+        if width * height > MAX_IMAGE_PIXELS:
+            raise ValueError('Изображение слишком большое.')
+        image.draft('RGB', VARIANTS[0][1])
+        image = ImageOps.exif_transpose(image)
+        has_alpha = image.mode in ('RGBA', 'LA', 'PA') or (
+            image.mode == 'P' and 'transparency' in image.info)
+        image = image.convert(
+            'RGBA' if has_alpha and VARIANT_FORMAT == 'WEBP' else 'RGB')
+        for name, size in VARIANTS:
+            image.thumbnail(size, Image.LANCZOS)
+            buffer = BytesIO()
+            image.save(buffer, VARIANT_FORMAT, quality=VARIANT_QUALITY)
+            yield name, buffer.getvalue()
+
+
+def generate_image_variants(recipe):
+    storage = recipe.image.storage
+    stem = PurePosixPath(recipe.image.name).stem
+    old_variants = recipe.image_variants or {}
+    with recipe.image.open('rb') as file:
+        variants = {
+            name: storage.save(
+                f'{VARIANTS_DIR}/{stem}_{name}.{VARIANT_EXTENSION}',
+                ContentFile(content)
+            )
+            for name, content in render_variants(file)
+        }
+    recipe.updated = timezone.now()
+    type(recipe).objects.filter(pk=recipe.pk).update(
+        image_variants=variants, updated=recipe.updated)
+    recipe.image_variants = variants
+    bump_object_versions(type(recipe), [recipe.pk])
+    for path in set(old_variants.values()) - set(variants.values()):
+        storage.delete(path)
+    return variants
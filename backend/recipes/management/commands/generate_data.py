@@ -0,0 +1,185 @@
+import random
+from io import BytesIO
+from itertools import accumulate
+from uuid import uuid4
+
+from django.contrib.auth.hashers import make_password
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import BaseCommand, CommandError
+from django.db import transaction
+from PIL import Image
+
+from recipes.cart import rebuild_cart_totals
+from recipes.catalog import bump_catalog_version
+from recipes.counters import reconcile_counters
+from recipes.models import (FavoriteRecipe, Ingredient, IngredientToRecipe,
+                            Recipe, RecipeInShoppingList, Tag)
+from users.models import CustomUser, Subscription
+
+PLACEHOLDER_IMAGE = 'images/generated.jpg'
+DEFAULT_TAGS = (
+    ('Завтрак', '#E26C2D', 'breakfast'),
+    ('Обед', '#49B64E', 'lunch'),
+    ('Ужин', '#8775D2', 'dinner'),
+)
+ADJECTIVES = (
+    'Домашний', 'Быстрый', 'Летний', 'Острый', 'Сливочный', 'Пряный',
+    'Овощной', 'Праздничный', 'Лёгкий', 'Бабушкин',
+)
+DISHES = (
+    'суп', 'салат', 'пирог', 'плов', 'омлет', 'борщ', 'рагу', 'десерт',
+    'соус', 'гуляш', 'штрудель', 'ризотто',
+)
+
+
+def zipf_weights(size, exponent=1.1):
+    return list(accumulate(
+        1 / (rank + 1) ** exponent for rank in range(size)))
+
+
+def weighted_sample(population, cum_weights, k):
+    k = min(k, len(population))
+    chosen = set()
+    while len(chosen) < k:
+        chosen.update(random.choices(
+            population, cum_weights=cum_weights, k=k - len(chosen)))
+    return chosen
+
+
+class Command(BaseCommand):
+    help = 'Генерация синтетических данных для нагрузочного тестирования'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--users', type=int, default=100,
+            help='Количество пользователей')
+        parser.add_argument(
+            '--recipes', type=int, default=10,
+            help='Среднее количество рецептов на пользователя')
+        parser.add_argument(
+            '--favorites', type=int, default=20,
+            help='Среднее количество рецептов в избранном')
+        parser.add_argument(
+            '--cart', type=int, default=5,
+            help='Среднее количество рецептов в корзине')
+        parser.add_argument(
+            '--subscriptions', type=int, default=10,
+            help='Среднее количество подписок')
+        parser.add_argument(
+            '--password', default='benchmark-password',
+            help='Пароль создаваемых пользователей')
+        parser.add_argument(
+            '--seed', type=int, help='Начальное значение генератора')
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Количество строк в одном INSERT')
+
+    def around(self, mean):
+        return random.randint(0, 2 * mean) if mean > 0 else 0
+
+    def get_placeholder_image(self):
+        if not default_storage.exists(PLACEHOLDER_IMAGE):
+            buffer = BytesIO()
+            Image.new('RGB', (600, 400), '#E26C2D').save(buffer, 'JPEG')
+            return default_storage.save(
+                PLACEHOLDER_IMAGE, ContentFile(buffer.getvalue()))
+        return PLACEHOLDER_IMAGE
+
+    def get_tags(self):
+        tags = list(Tag.objects.values_list('pk', flat=True))
+        if not tags:
+            tags = [
+                Tag.objects.create(name=name, color=color, slug=slug).pk
+                for name, color, slug in DEFAULT_TAGS
+            ]
+        return tags
+
+    def create_users(self, count, password):
+        run = uuid4().hex[:8]
+        password = make_password(password)
+        return [user.pk for user in CustomUser.objects.bulk_create([
+            CustomUser(
+                username=f'user_{run}_{index}',
+                email=f'user_{run}_{index}@example.com',
+                first_name='Тест',
+                last_name=f'Пользователь {index}',
+                password=password,
+            ) for index in range(count)
+        ], batch_size=self.batch_size)]
+
+    def create_recipes(self, users, mean, image):
+        return [recipe.pk for recipe in Recipe.objects.bulk_create([
+            Recipe(
+                author_id=user_id,
+                name=f'{random.choice(ADJECTIVES)} {random.choice(DISHES)}',
+                text=' '.join(random.choices(DISHES, k=30)),
+                cooking_time=random.randint(5, 180),
+                image=image,
+            )
+            for user_id in users
+            for _ in range(self.around(mean))
+        ], batch_size=self.batch_size)]
+
+    def fill_recipes(self, recipes, tags, ingredients):
+        tag_weights = zipf_weights(len(tags))
+        ingredient_weights = zipf_weights(len(ingredients))
+        Recipe.tags.through.objects.bulk_create([
+            Recipe.tags.through(recipe_id=recipe_id, tag_id=tag_id)
+            for recipe_id in recipes
+            for tag_id in weighted_sample(
+                tags, tag_weights, random.randint(1, 3))
+        ], batch_size=self.batch_size)
+        IngredientToRecipe.objects.bulk_create([
+            IngredientToRecipe(
+                recipe_id=recipe_id,
+                ingredient_id=ingredient_id,
+                amount=random.randint(1, 500),
+            )
+            for recipe_id in recipes
+            for ingredient_id in weighted_sample(
+                ingredients, ingredient_weights, random.randint(3, 12))
+        ], batch_size=self.batch_size)
+
+    def create_relations(self, model, users, targets, mean, field):
+        weights = zipf_weights(len(targets))
+        model.objects.bulk_create([
+            model(user_id=user_id, **{f'{field}_id': target_id})
+            for user_id in users
+            for target_id in weighted_sample(
+                targets, weights, self.around(mean))
+            if target_id != user_id or field != 'author'
+        ], batch_size=self.batch_size, ignore_conflicts=True)
+
+    def handle(self, *args, **options):
+        if options['seed'] is not None:
+            random.seed(options['seed'])
+        self.batch_size = options['batch_size']
+        ingredients = list(Ingredient.objects.values_list('pk', flat=True))
+        if not ingredients:
+            raise CommandError(
+                'No ingredients found, run import_ingredients first')
+        random.shuffle(ingredients)
+        image = self.get_placeholder_image()
+        with transaction.atomic():
+            tags = self.get_tags()
+            users = self.create_users(options['users'], options['password'])
+            recipes = self.create_recipes(users, options['recipes'], image)
+            self.fill_recipes(recipes, tags, ingredients)
+            popular_recipes = random.sample(recipes, len(recipes))
+            popular_authors = random.sample(users, len(users))
+            if popular_recipes:
+                self.create_relations(
+                    FavoriteRecipe, users, popular_recipes,
+                    options['favorites'], 'recipe')
+                self.create_relations(
+                    RecipeInShoppingList, users, popular_recipes,
+                    options['cart'], 'recipe')
+            self.create_relations(
+                Subscription, users, popular_authors,
+                options['subscriptions'], 'author')
+            reconcile_counters()
+            rebuild_cart_totals(users, batch_size=self.batch_size)
+        bump_catalog_version(Recipe)
+        self.stdout.write(self.style.SUCCESS(
+            f'Generated {len(users)} users, {len(recipes)} recipes'))
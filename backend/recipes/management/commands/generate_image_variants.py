@@ -0,0 +1,29 @@
+from django.core.management import BaseCommand
+
+from recipes.images import generate_image_variants
+from recipes.models import Recipe
+
+
+class Command(BaseCommand):
+    help = 'Создание уменьшенных копий изображений рецептов'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all', action='store_true',
+            help='Пересоздать копии и для рецептов, у которых они уже есть')
+
+    def handle(self, *args, **options):
+        recipes = Recipe.objects.only('pk', 'image', 'image_variants')
+        if not options['all']:
+            recipes = recipes.filter(image_variants={})
+        done = failed = 0
+        for recipe in recipes.iterator(chunk_size=100):
+            try:
+                generate_image_variants(recipe)
+            except (OSError, ValueError) as error:
+                failed += 1
+                self.stderr.write(f'Recipe {recipe.pk}: {error}')
+            else:
+                done += 1
+        self.stdout.write(self.style.SUCCESS(
+            f'Image variants generated: {done}, failed: {failed}'))
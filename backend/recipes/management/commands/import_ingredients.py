@@ -1,20 +1,138 @@
 import csv
+import json
+import re
+from itertools import islice
+from pathlib import Path
 
-from django.core.management import BaseCommand
+from django.core.management import BaseCommand, CommandError
 
+from recipes.catalog import bump_catalog_version
 from recipes.models import Ingredient
 
+CHUNK_SIZE = 1 << 16
+
+
+class JSONArrayReader:
+    whitespace = re.compile(r'\s*')
+
+    def __init__(self, file, chunk_size=CHUNK_SIZE):
+        self.file = file
+        self.chunk_size = chunk_size
+        self.decoder = json.JSONDecoder()
+        self.buffer = ''
+        self.position = 0
+
+    def fill(self):
+        chunk = self.file.read(self.chunk_size)
+        if not chunk:
+            return False
+        self.buffer = self.buffer[self.position:] + chunk
+        self.position = 0
+        return True
+
+    def skip_whitespace(self):
+        self.position = self.whitespace.match(
+            self.buffer, self.position).end()
+
+    def next_char(self):
+        self.skip_whitespace()
+        while self.position == len(self.buffer):
+            if not self.fill():
+                raise ValueError('unexpected end of JSON array')
+            self.skip_whitespace()
+        return self.buffer[self.position]
+
+    def expect(self, char):
+        if self.next_char() != char:
+            raise ValueError(f'expected {char!r} in JSON array')
+        self.position += 1
+
+    def decode(self):
+        self.next_char()
+        while True:
+            try:
+                item, end = self.decoder.raw_decode(
+                    self.buffer, self.position)
+            except json.JSONDecodeError:
+                if not self.fill():
+                    raise
+                continue
+            following = self.whitespace.match(self.buffer, end).end()
+            if self.buffer[following:following + 1] in (',', ']') or (
+                    not self.fill()):
+                self.position = end
+                return item
+
+    def __iter__(self):
+        self.expect('[')
+        if self.next_char() == ']':
+            return
+        while True:
+            yield self.decode()
+            if self.next_char() == ']':
+                return
+            self.expect(',')
+
 
 class Command(BaseCommand):
-    help = 'Импорт ингредиентов из CSV-файлов'
+    help = 'Импорт ингредиентов из CSV- или JSON-файлов'
 
-    def handle(self, *args, **options):
-        with open('../data/ingredients.csv', encoding='utf-8') as csv_file:
-            csv_reader = csv.reader(csv_file)
-            for row in csv_reader:
-                print(row)
-                Ingredient.objects.get_or_create(
-                    name=row[0], measurement_unit=row[1])
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path', nargs='?', default='../data/ingredients.csv',
+            help='Путь к файлу с ингредиентами')
+        parser.add_argument(
+            '--format', choices=('csv', 'json'),
+            help='Формат файла, по умолчанию определяется по расширению')
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Количество строк в одном INSERT')
 
+    def read_csv(self, file):
+        for row in csv.reader(file):
+            if len(row) >= 2:
+                yield row[0], row[1]
+            else:
+                yield None
+
+    def read_json(self, file):
+        for item in JSONArrayReader(file):
+            if isinstance(item, dict):
+                yield item.get('name'), item.get('measurement_unit')
+            else:
+                yield None
+
+    def handle(self, *args, **options):
+        path = Path(options['path'])
+        file_format = options['format'] or path.suffix.lstrip('.').lower()
+        if file_format not in ('csv', 'json'):
+            raise CommandError(f'Unknown file format: {path}')
+        batch_size = options['batch_size']
+        if batch_size <= 0:
+            raise CommandError('--batch-size must be a positive number')
+        processed = invalid = 0
+        before = Ingredient.objects.count()
+        try:
+            with open(path, encoding='utf-8') as file:
+                rows = getattr(self, f'read_{file_format}')(file)
+                while batch := list(islice(rows, batch_size)):
+                    ingredients = []
+                    for row in batch:
+                        name, unit = row or (None, None)
+                        if not name or not unit:
+                            invalid += 1
+                            continue
+                        ingredients.append(Ingredient(
+                            name=name.strip(), measurement_unit=unit.strip()))
+                    Ingredient.objects.bulk_create(
+                        ingredients, ignore_conflicts=True)
+                    processed += len(ingredients)
+        except (OSError, ValueError) as error:
+            raise CommandError(f'Cannot import {path}: {error}')
+        inserted = Ingredient.objects.count() - before
+        if inserted:
+            bump_catalog_version(Ingredient)
         self.stdout.write(self.style.SUCCESS(
-            'Ingredients imported successfully'))
+            f'Ingredients imported: inserted {inserted}, '
+            f'skipped {processed - inserted} existing, '
+            f'invalid {invalid}'))
@@ -0,0 +1,39 @@
+from django.core.management import BaseCommand, CommandError
+
+from recipes.cart import (compute_cart_totals, get_stored_totals,
+                          rebuild_cart_totals)
+
+
+class Command(BaseCommand):
+    help = 'Пересчёт и проверка агрегированных корзин покупок'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--verify', action='store_true',
+            help='Только сравнить сохранённые суммы с пересчитанными')
+        parser.add_argument(
+            '--user', type=int, action='append', dest='user_ids',
+            help='Ограничить пересчёт указанными пользователями')
+
+    def handle(self, *args, **options):
+        user_ids = options['user_ids']
+        if not options['verify']:
+            count = rebuild_cart_totals(user_ids)
+            self.stdout.write(self.style.SUCCESS(
+                f'Shopping carts rebuilt: {count} rows'))
+            return
+        expected = compute_cart_totals(user_ids)
+        stored = get_stored_totals(user_ids)
+        mismatches = [
+            (key, stored.get(key), expected.get(key))
+            for key in sorted(expected.keys() | stored.keys())
+            if stored.get(key) != expected.get(key)
+        ]
+        for (user_id, ingredient_id), actual, amount in mismatches:
+            self.stdout.write(
+                f'user={user_id} ingredient={ingredient_id}: '
+                f'stored={actual} expected={amount}')
+        if mismatches:
+            raise CommandError(
+                f'Shopping carts differ in {len(mismatches)} rows')
+        self.stdout.write(self.style.SUCCESS('Shopping carts are consistent'))
@@ -0,0 +1,12 @@
+from django.core.management import BaseCommand
+
+from recipes.counters import reconcile_counters
+
+
+class Command(BaseCommand):
+    help = 'Пересчёт счётчиков избранного, корзин, рецептов и подписчиков'
+
+    def handle(self, *args, **options):
+        for counter, fixed in reconcile_counters().items():
+            self.stdout.write(f'{counter}: fixed {fixed} rows')
+        self.stdout.write(self.style.SUCCESS('Counters reconciled'))
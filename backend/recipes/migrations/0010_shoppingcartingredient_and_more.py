@@ -0,0 +1,56 @@
+# Generated by Django 4.2.4 on 2026-10-17 03:54
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Sum
+
+
+def fill_cart_ingredients(apps, schema_editor):
+    RecipeInShoppingList = apps.get_model('recipes', 'RecipeInShoppingList')
+    ShoppingCartIngredient = apps.get_model(
+        'recipes', 'ShoppingCartIngredient')
+    rows = RecipeInShoppingList.objects.values(
+        'user_id', 'recipe__ingredients_recipe__ingredient_id'
+    ).annotate(
+        total=Sum('recipe__ingredients_recipe__amount')
+    ).order_by()
+    ShoppingCartIngredient.objects.bulk_create([
+        ShoppingCartIngredient(
+            user_id=row['user_id'],
+            ingredient_id=row['recipe__ingredients_recipe__ingredient_id'],
+            amount=row['total'],
+        )
+        for row in rows
+        if row['recipe__ingredients_recipe__ingredient_id'] is not None
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('recipes', '0009_alter_recipeinshoppinglist_options'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ShoppingCartIngredient',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('amount', models.PositiveIntegerField(verbose_name='Количество')),
+                ('ingredient', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='recipes.ingredient', verbose_name='Ингредиент')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='cart_ingredients', to=settings.AUTH_USER_MODEL, verbose_name='Пользователь')),
+            ],
+            options={
+                'verbose_name': 'Ингредиент в корзине',
+                'verbose_name_plural': 'Ингредиенты в корзине',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='shoppingcartingredient',
+            constraint=models.UniqueConstraint(fields=('user', 'ingredient'), name='unique_cart_ingredient'),
+        ),
+        migrations.RunPython(
+            fill_cart_ingredients, migrations.RunPython.noop),
+    ]
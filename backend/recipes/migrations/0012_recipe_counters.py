@@ -0,0 +1,53 @@
+# Generated by Django 4.2.4 on 2026-10-17 03:57
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+COUNTERS = (
+    ('recipes', 'Recipe', 'favorites_count', 'FavoriteRecipe', 'recipe'),
+    ('recipes', 'Recipe', 'in_carts_count', 'RecipeInShoppingList', 'recipe'),
+    ('users', 'CustomUser', 'recipes_count', 'Recipe', 'author'),
+    ('users', 'CustomUser', 'subscribers_count', 'Subscription', 'author'),
+)
+SOURCE_APPS = {
+    'FavoriteRecipe': 'recipes',
+    'RecipeInShoppingList': 'recipes',
+    'Recipe': 'recipes',
+    'Subscription': 'users',
+}
+
+
+def fill_counters(apps, schema_editor):
+    for app_label, model_name, counter, source_name, field in COUNTERS:
+        model = apps.get_model(app_label, model_name)
+        source = apps.get_model(SOURCE_APPS[source_name], source_name)
+        model.objects.update(**{counter: Coalesce(Subquery(
+            source.objects.filter(
+                **{field: OuterRef('pk')}
+            ).order_by().values(field).annotate(
+                total=Count('pk')
+            ).values('total')
+        ), 0)})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0011_recipe_search_vector'),
+        ('users', '0002_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='favorites_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='В избранном'),
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='in_carts_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='В корзинах'),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
@@ -1,5 +1,7 @@
+from django.contrib.postgres.search import (SearchQuery, SearchRank,
+                                            SearchVectorField)
 from django.core.validators import MinValueValidator
-from django.db import models
+from django.db import connections, models
 
 from users.models import CustomUser
 
@@ -39,6 +41,43 @@ class Ingredient(models.Model):
         return f'{self.name}, {self.measurement_unit}.'
 
 
+class RecipeQuerySet(models.QuerySet):
+    prefetch_lookups = ('tags', 'ingredients_recipe__ingredient')
+
+    def with_related(self):
+        return self.select_related('author').prefetch_related(
+            *self.prefetch_lookups).defer('search_vector')
+
+    def with_tags(self, slugs, match_all=False):
+        recipe_tags = self.model.tags.through.objects.filter(
+            recipe=models.OuterRef('pk'))
+        if not match_all:
+            return self.filter(models.Exists(
+                recipe_tags.filter(tag__slug__in=slugs)))
+        queryset = self
+        for slug in set(slugs):
+            queryset = queryset.filter(models.Exists(
+                recipe_tags.filter(tag__slug=slug)))
+        return queryset
+
+    def search(self, text):
+        if connections[self.db].vendor == 'postgresql':
+            query = SearchQuery(
+                text, config='russian', search_type='websearch')
+            return self.filter(search_vector=query).annotate(
+                rank=SearchRank(models.F('search_vector'), query)
+            ).order_by('-rank', 'name', 'id')
+        return self.filter(
+            models.Q(name__icontains=text) | models.Q(text__icontains=text)
+        ).annotate(
+            rank=models.Case(
+                models.When(name__icontains=text, then=models.Value(1.0)),
+                default=models.Value(0.5),
+                output_field=models.FloatField(),
+            )
+        ).order_by('-rank', 'name', 'id')
+
+
 class Recipe(models.Model):
     author = models.ForeignKey(
         CustomUser,
@@ -56,6 +95,12 @@ class Recipe(models.Model):
         verbose_name='Тег',
     )
     image = models.ImageField(upload_to='images')
+    image_variants = models.JSONField(
+        default=dict,
+        blank=True,
+        editable=False,
+        verbose_name='Уменьшенные копии изображения',
+    )
     name = models.CharField(
         max_length=200,
         verbose_name='Название рецепта',
@@ -69,11 +114,40 @@ class Recipe(models.Model):
             MinValueValidator(1, 'Минимальное время приготовления = 1')
         ]
     )
+    favorites_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='В избранном',
+    )
+    in_carts_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='В корзинах',
+    )
+    search_vector = SearchVectorField(
+        null=True,
+        editable=False,
+        verbose_name='Поисковый вектор',
+    )
+    created = models.DateTimeField(
+        auto_now_add=True,
+        db_index=True,
+        verbose_name='Дата создания',
+    )
+    updated = models.DateTimeField(
+        auto_now=True,
+        verbose_name='Дата изменения',
+    )
+
+    objects = RecipeQuerySet.as_manager()
 
     class Meta:
         verbose_name = 'Рецепт',
         verbose_name_plural = 'Рецепты'
         ordering = ('name',)
+        indexes = [
+            models.Index(fields=('name', 'id'), name='recipe_name_id'),
+        ]
 
     def __str__(self):
         return self.name
@@ -159,3 +233,29 @@ class RecipeInShoppingList(models.Model):
 
     def __str__(self):
         return f'{self.user.email} - {self.recipe.name}.'
+
+
+class ShoppingCartIngredient(models.Model):
+    user = models.ForeignKey(
+        CustomUser, on_delete=models.CASCADE,
+        related_name='cart_ingredients',
+        verbose_name='Пользователь'
+    )
+    ingredient = models.ForeignKey(
+        Ingredient, on_delete=models.CASCADE,
+        verbose_name='Ингредиент'
+    )
+    amount = models.PositiveIntegerField(verbose_name='Количество')
+
+    class Meta:
+        verbose_name = 'Ингредиент в корзине'
+        verbose_name_plural = 'Ингредиенты в корзине'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'ingredient'],
+                name='unique_cart_ingredient'
+            )
+        ]
+
+    def __str__(self):
+        return f'{self.user} - {self.ingredient.name} - {self.amount}.'
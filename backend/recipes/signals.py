@@ -0,0 +1,33 @@
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from users.models import CustomUser
+
+from .catalog import bump_catalog_version, bump_object_versions
+from .models import Ingredient, Recipe, Tag
+
+AUTHOR_FIELDS = frozenset(('email', 'username', 'first_name', 'last_name'))
+
+
+@receiver((post_save, post_delete), sender=Ingredient)
+@receiver((post_save, post_delete), sender=Tag)
+def catalog_changed(sender, **kwargs):
+    transaction.on_commit(partial(bump_catalog_version, sender))
+
+
+@receiver((post_save, post_delete), sender=Recipe)
+def recipe_changed(sender, instance, **kwargs):
+    transaction.on_commit(partial(bump_object_versions, sender, [instance.pk]))
+
+
+@receiver(post_save, sender=CustomUser)
+def author_changed(sender, instance, created, update_fields, **kwargs):
+    if created or (update_fields and AUTHOR_FIELDS.isdisjoint(update_fields)):
+        return
+    pks = list(Recipe.objects.filter(
+        author=instance).values_list('pk', flat=True))
+    if pks:
+        transaction.on_commit(partial(bump_object_versions, Recipe, pks))
@@ -0,0 +1,11 @@
+from jobs.queue import task
+
+from .images import generate_image_variants
+from .models import Recipe
+
+
+@task(queue='images')
+def generate_recipe_image_variants(recipe_id):
+    recipe = Recipe.objects.filter(pk=recipe_id).first()
+    if recipe is not None:
+        generate_image_variants(recipe)
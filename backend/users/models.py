@@ -8,6 +8,16 @@ class CustomUser(AbstractUser):
     email = models.EmailField(
         unique=True,
         verbose_name='Email')
+    recipes_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Рецептов',
+    )
+    subscribers_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Подписчиков',
+    )
 
     def __str__(self):
         return self.username